@@ -1,5 +1,6 @@
 """Define the top-level cli command."""
-import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 import logging
 import sys
 
@@ -8,7 +9,15 @@ from loguru import logger
 
 from scrapd.cli.base import AbstractCommand
 from scrapd.core import apd
+from scrapd.core import constant
+from scrapd.core import crawl
+from scrapd.core.archive import PageArchive
+from scrapd.core.cache import ResponseCache
 from scrapd.core.formatter import Formatter
+from scrapd.core.index import PageIndex
+from scrapd.core.memo import ParseMemo
+from scrapd.core.scheduler import Scheduler
+from scrapd.core.state import CrawlState
 from scrapd.core.version import detect_from_metadata
 
 # Set the project name.
@@ -22,9 +31,38 @@ __version__ = detect_from_metadata(APP_NAME)
 #   The arguments are used via the `self.args` dict of the `AbstractCommand` class.
 @click.version_option(version=__version__)
 @click.command()
+@click.option(
+    '--adaptive',
+    is_flag=True,
+    help='adapt the number of requests in flight to the health of the APD website, up to the concurrency',
+    show_default=True,
+)
+@click.option('--archive', type=click.Path(dir_okay=False), help='archive all the fetched pages into a file')
 @click.option('-a', '--attempts', type=click.INT, default=3, help='number of attempts per report', show_default=True)
 @click.option('-b', '--backoff', type=click.INT, default=3, help='initial backoff time (second)', show_default=True)
+@click.option('--cache/--no-cache', default=True, help='use the on-disk HTTP response cache', show_default=True)
+@click.option(
+    '-c',
+    '--concurrency',
+    type=click.INT,
+    default=constant.MAX_IN_FLIGHT,
+    help='maximum number of requests in flight, 0 for unlimited',
+    show_default=True,
+)
+@click.option(
+    '--connect-timeout',
+    type=click.FLOAT,
+    default=constant.CONNECT_TIMEOUT,
+    help='deadline to connect to the APD website (second), 0 for none',
+    show_default=True,
+)
 @click.option('--dump', is_flag=True, help='dump reports with parsing issues', show_default=True)
+@click.option(
+    '--fanout',
+    is_flag=True,
+    help='fetch all the news pages at once, up to the last one',
+    show_default=True,
+)
 @click.option(
     '-f',
     '--format',
@@ -35,11 +73,85 @@ __version__ = detect_from_metadata(APP_NAME)
     show_default=True,
 )
 @click.option('--from', 'from_', help='start date')
+@click.option(
+    '--hedge',
+    is_flag=True,
+    help='send the requests slower than most of the recent ones a second time',
+    show_default=True,
+)
+@click.option('--incremental', is_flag=True, help='only fetch the reports unknown to previous runs', show_default=True)
+@click.option(
+    '--memo/--no-memo',
+    default=True,
+    help='reuse the reports parsed from identical pages by the same parser',
+    show_default=True,
+)
 @click.option('--pages', default=-1, help='number pages to process')
+@click.option(
+    '--prefetch',
+    type=click.INT,
+    default=constant.PREFETCH,
+    help='number of news pages to fetch ahead',
+    show_default=True,
+)
+@click.option(
+    '--prefilter/--no-prefilter',
+    default=True,
+    help='skip the reports published outside of the time range without fetching them',
+    show_default=True,
+)
+@click.option(
+    '--purge-cache',
+    is_flag=True,
+    help='remove the cached responses, parsed pages and page index before running',
+    show_default=True,
+)
+@click.option(
+    '-r',
+    '--rate',
+    type=click.FLOAT,
+    default=constant.RATE,
+    help='maximum number of requests per second, 0 for unlimited',
+    show_default=True,
+)
+@click.option(
+    '--read-timeout',
+    type=click.FLOAT,
+    default=constant.READ_TIMEOUT,
+    help='deadline between two reads of a response (second), 0 for none',
+    show_default=True,
+)
+@click.option(
+    '--replay',
+    type=click.Path(exists=True),
+    help='read the pages from an archive directory or file instead of the APD website',
+)
+@click.option(
+    '--seek',
+    is_flag=True,
+    help='start at the first news page which may contain reports up to the end date',
+    show_default=True,
+)
+@click.option(
+    '--tiered',
+    is_flag=True,
+    help='skip the article parsing of the fields found in the twitter metadata',
+    show_default=True,
+)
 @click.option('--to', help='end date')
 @click.option('-v', '--verbose', count=True, help='adjust the log level')
+@click.option(
+    '-w',
+    '--workers',
+    type=click.INT,
+    default=0,
+    help='number of processes parsing the reports, 0 to parse them in the main process',
+    show_default=True,
+)
 @click.pass_context
-def cli(ctx, attempts, backoff, dump, format_, from_, pages, to, verbose):  # noqa: D403
+def cli(ctx, adaptive, archive, attempts, backoff, cache, concurrency, connect_timeout, dump, fanout, format_, from_,
+        hedge, incremental, memo, pages, prefetch, prefilter, purge_cache, rate, read_timeout, replay, seek, tiered, to,
+        verbose, workers):  # noqa: D403
     """Retrieve APD's traffic fatality reports."""
     ctx.obj = {**ctx.params}
     ctx.auto_envvar_prefix = 'VZ'
@@ -75,20 +187,98 @@ class Retrieve(AbstractCommand):
 
     def _execute(self):
         """Define the internal execution of the command."""
-        # Collect the results.
-        results, _ = asyncio.run(
-            apd.async_retrieve(
+        # Prepare the response cache, the parse memo and the page index.
+        response_cache = ResponseCache()
+        parse_memo = ParseMemo()
+        page_index = PageIndex(constant.INDEX_FILE)
+        if self.args['purge_cache']:
+            response_cache.purge()
+            parse_memo.purge()
+            page_index.purge()
+
+        # The page index is only used, and therefore only maintained, when seeking.
+        seek = self.args['seek']
+        if seek:
+            page_index.load()
+
+        # Load the state of the previous runs.
+        state = None
+        if self.args['incremental']:
+            state = CrawlState(constant.STATE_FILE)
+            state.load()
+
+        # The pages of an archive are read locally: they are neither cached nor rate limited.
+        replay = self.args['replay']
+        use_cache = self.args['cache'] and not replay
+        scheduler = None if replay else Scheduler(
+            self.args['concurrency'],
+            self.args['rate'],
+            hedge=self.args['hedge'],
+            adaptive=self.args['adaptive'],
+        )
+
+        # Prepare the parsing workers.
+        workers = self.args['workers']
+        executor = ProcessPoolExecutor(workers, initializer=apd.init_worker) if workers > 0 else nullcontext()
+
+        # Print the results as they are collected.
+        format_ = self.args['format_'].lower()
+        formatter = Formatter(format_)
+        context = apd.CrawlContext(
+            cache=response_cache if use_cache else None,
+            scheduler=scheduler,
+            archive=PageArchive(self.args['archive']) if self.args['archive'] else None,
+            executor=executor if workers > 0 else None,
+            tiered=self.args['tiered'],
+            memo=parse_memo if self.args['memo'] else None,
+        )
+        progress = context.progress
+        with executor:
+            results = crawl.iter_reports(
                 self.args['pages'],
                 self.args['from_'],
                 self.args['to'],
                 self.args['attempts'],
                 self.args['backoff'],
                 self.args['dump'],
-            ))
-        result_count = len(results)
-        logger.info(f'Total: {result_count}')
+                context=context,
+                prefetch=self.args['prefetch'],
+                state=state,
+                replay_dir=replay,
+                prefilter=self.args['prefilter'],
+                seek=seek,
+                index=page_index if seek and not replay else None,
+                fanout=self.args['fanout'],
+                timeout=apd.client_timeout(self.args['connect_timeout'], self.args['read_timeout']),
+            )
+            formatter.print(self._count(results, progress))
+        logger.info(f'Total: {progress["results"]}')
+        coalesced = scheduler.coalesced if scheduler else 0
+        logger.info(f'Requests saved by deduplication: {progress["duplicates"] + coalesced}')
+        if self.args['adaptive'] and scheduler:
+            concurrency = scheduler.concurrency
+            logger.info(f'Concurrency window: {concurrency.limit} (narrowed {concurrency.decreases} time(s))')
+        if self.args['hedge'] and scheduler:
+            logger.info(f'Requests hedged: {scheduler.hedged}')
+        if self.args['memo']:
+            logger.info(f'Pages found in the memo: {progress["memoized"]}')
+        if self.args['prefilter']:
+            logger.info(f'Pages skipped because of their publication date: {progress["prefiltered"]}')
+        if self.args['tiered']:
+            logger.info(f'Pages whose article was only parsed for the fields missing from the twitter metadata: '
+                        f'{progress["short_circuited"]}')
 
-        # Get the format and print the results.
-        format_ = self.args['format_'].lower()
-        formatter = Formatter(format_)
-        formatter.print(results)
+    @staticmethod
+    def _count(results, progress):
+        """
+        Count the results while they are being printed.
+
+        :param iterator results: the results
+        :param dict progress: receives the number of results under the `results` key
+        :return: an iterator over the results.
+        :rtype: iterator
+        """
+        progress['results'] = 0
+        for result in results:
+            progress['results'] += 1
+            yield result
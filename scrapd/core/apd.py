@@ -1,5 +1,8 @@
 """Define the module containing the function used to scrap data from the APD website."""
 import asyncio
+from collections import namedtuple
+from contextlib import asynccontextmanager
+import datetime
 from pathlib import Path
 import re
 from urllib.parse import urljoin
@@ -12,32 +15,204 @@ from tenacity import wait_exponential
 
 from scrapd.core import article
 from scrapd.core import constant
-from scrapd.core import date_utils
 from scrapd.core import model
 from scrapd.core import twitter
+from scrapd.core.cache import ResponseCache
 from scrapd.core.regex import match_pattern
+from scrapd.core.replay import ReplaySession
 
 APD_URL = 'http://austintexas.gov/department/news/296'
 PAGE_DETAILS_URL = 'http://austintexas.gov/'
 
+Response = namedtuple('Response', ['url', 'status', 'headers', 'text'])
+# Patterns of the news listed on the news pages.
+NEWS_ROW_PATTERN = re.compile(r'<li\s+class="views-row.*?</li>', re.DOTALL)
+NEWS_LINK_PATTERN = re.compile(r'<a\s+href="([^"]+)"')
+PAGER_PATTERN = re.compile(r'<li\s+class="pager-current">\s*\d+\s+of\s+(\d+)\s*</li>')
+PUBLICATION_DATE_PATTERN = re.compile(r'property="dc:date"[^>]*\scontent="(\d{4}-\d{2}-\d{2})')
+
+ParsedPage = namedtuple('ParsedPage', ['report', 'short_circuited', 'errors'], defaults=((), ))
+
+
+class CrawlContext():
+    """Bundle the resources shared by the fetches and the parsing of the pages of a crawl."""
+
+    def __init__(
+            self,
+            cache=None,
+            scheduler=None,
+            archive=None,
+            executor=None,
+            tiered=False,
+            progress=None,
+            memo=None,
+    ):
+        """
+        Initialize the context.
+
+        :param cache.ResponseCache cache: response cache, defaults to None
+        :param scheduler.Scheduler scheduler: request scheduler, defaults to None
+        :param archive.PageArchive archive: archive of the fetched pages, defaults to None
+        :param concurrent.futures.Executor executor: parse the detail pages in this executor instead of the event loop,
+            defaults to None
+        :param bool tiered: skip the article extractors of the fields found in the twitter metadata, defaults to False
+        :param dict progress: counts the detail pages whose article extractors were all skipped under the
+            `short_circuited` key, and the detail pages found in the memo under the `memoized` key, defaults to an empty
+            dictionary
+        :param memo.ParseMemo memo: reports parsed from the previous pages, defaults to None. The detail pages
+            identical to pages already parsed by the same parser are not parsed again.
+        """
+        self.cache = cache
+        self.scheduler = scheduler
+        self.archive = archive
+        self.executor = executor
+        self.tiered = tiered
+        self.progress = {} if progress is None else progress
+        self.memo = memo
+
+
+def client_timeout(connect=constant.CONNECT_TIMEOUT, read=constant.READ_TIMEOUT):
+    """
+    Build the deadlines of the requests.
+
+    :param float connect: deadline to connect to the server (second), 0 for none
+    :param float read: deadline between two reads of the response (second), 0 for none
+    :return: the deadlines of the requests.
+    :rtype: aiohttp.ClientTimeout
+    """
+    return aiohttp.ClientTimeout(total=None, sock_connect=connect or None, sock_read=read or None)
+
+
+def create_session(timeout=None, limit_per_host=constant.LIMIT_PER_HOST):
+    """
+    Create an HTTP session tuned for crawling the APD website.
+
+    The connections are kept alive between the requests, the DNS lookups are cached, and the responses can be
+    compressed. The number of requests in flight is capped by the scheduler rather than by the connection pool.
+
+    :param aiohttp.ClientTimeout timeout: deadlines of the requests, defaults to the ones of :func:`client_timeout`
+    :param int limit_per_host: maximum number of connections per host, 0 for unlimited
+    :return: the HTTP session.
+    :rtype: aiohttp.ClientSession
+    """
+    connector = aiohttp.TCPConnector(
+        limit=0,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=constant.DNS_CACHE_TTL,
+        keepalive_timeout=constant.KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout or client_timeout(),
+        headers={'Accept-Encoding': 'gzip, deflate'},
+    )
+
+
+@asynccontextmanager
+async def open_session(session=None, replay_dir=None, timeout=None):
+    """
+    Open the session of a crawl.
+
+    :param aiohttp.ClientSession session: session owned by the caller, which is used as is and left open, defaults to
+        None
+    :param str replay_dir: read the pages from this archive directory or page archive file, defaults to None
+    :param aiohttp.ClientTimeout timeout: deadlines of the requests, defaults to the ones of :func:`client_timeout`
+    :return: an asynchronous context manager returning the session.
+    """
+    if session is not None:
+        yield session
+        return
+    async with ReplaySession(replay_dir) if replay_dir else create_session(timeout) as own_session:
+        yield own_session
+
+
+async def get(session, url, params=None, headers=None):
+    """
+    Send a GET request and read the response.
+
+    :param aiohttp.ClientSession session: aiohttp session
+    :param str url: request URL
+    :param dict params: request paramemters, defaults to None
+    :param dict headers: request headers, defaults to None
+    :return: the response.
+    :rtype: Response
+    """
+    async with session.get(url, params=params, headers=headers) as response:
+        logger.debug(response.url)
+        return Response(str(response.url), response.status, response.headers, await response.text())
+
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=3), reraise=True)
-async def fetch_text(session, url, params=None):
+async def fetch_text(session, url, params=None, cache=None, ttl=0, scheduler=None, archive=None):
     """
     Fetch the data from a URL as text.
 
+    If a cache is provided, a fresh cached response is returned without any request, and a stale one is revalidated
+    with a conditional request. If a scheduler is provided, the concurrent fetches of the same URL share a single
+    request.
+
+    :param aiohttp.ClientSession session: aiohttp session
+    :param str url: request URL
+    :param dict params: request paramemters, defaults to None
+    :param cache.ResponseCache cache: response cache, defaults to None
+    :param int ttl: time to live of the cached response (second), defaults to 0
+    :param scheduler.Scheduler scheduler: request scheduler, defaults to None
+    :param archive.PageArchive archive: archive of the fetched pages, defaults to None
+    :return: the data from a URL as text.
+    :rtype: str
+    """
+    if scheduler:
+        return await scheduler.coalesce(
+            ResponseCache.cache_url(url, params),
+            lambda: download_text(session, url, params, cache, ttl, scheduler, archive),
+        )
+    return await download_text(session, url, params, cache, ttl, scheduler, archive)
+
+
+def archive_cached(archive, entry):
+    """
+    Append a cached response to the archive.
+
+    :param archive.PageArchive archive: archive of the fetched pages, or None
+    :param cache.CacheEntry entry: the cached response
+    :return: the body of the cached response.
+    :rtype: str
+    """
+    if archive:
+        headers = {'ETag': entry.etag, 'Last-Modified': entry.last_modified}
+        archive.write(entry.url, 200, {k: v for k, v in headers.items() if v}, entry.body)
+    return entry.body
+
+
+async def download_text(session, url, params=None, cache=None, ttl=0, scheduler=None, archive=None):
+    """
+    Download the data from a URL as text, going through the cache, the scheduler and the archive.
+
     :param aiohttp.ClientSession session: aiohttp session
     :param str url: request URL
     :param dict params: request paramemters, defaults to None
+    :param cache.ResponseCache cache: response cache, defaults to None
+    :param int ttl: time to live of the cached response (second), defaults to 0
+    :param scheduler.Scheduler scheduler: request scheduler, defaults to None
+    :param archive.PageArchive archive: archive of the fetched pages, defaults to None
     :return: the data from a URL as text.
     :rtype: str
     """
     if not params:
         params = {}
+
+    # Look for a cached response.
+    entry = cache.get(url, params) if cache else None
+    if entry and entry.is_fresh(ttl):
+        logger.debug(f'{entry.url} (cached)')
+        return archive_cached(archive, entry)
+    headers = entry.conditional_headers() if entry else {}
+
     try:
-        async with session.get(url, params=params) as response:
-            logger.debug(response.url)
-            return await response.text()
+        if scheduler:
+            response = await scheduler.submit(url, lambda: get(session, url, params, headers))
+        else:
+            response = await get(session, url, params, headers)
     except (
             aiohttp.ClientError,
             aiohttp.http_exceptions.HttpProcessingError,
@@ -45,8 +220,17 @@ async def fetch_text(session, url, params=None):
         logger.error(f'aiohttp exception for {url} -> {e}')
         raise e
 
+    if entry and response.status == 304:
+        cache.save(entry)
+        return archive_cached(archive, entry)
+    if archive:
+        archive.write(ResponseCache.cache_url(url, params), response.status, response.headers, response.text)
+    if cache and response.status == 200:
+        cache.set(url, params, response.text, response.headers)
+    return response.text
 
-async def fetch_news_page(session, page=1):
+
+async def fetch_news_page(session, page=1, context=None):
     """
     Fetch the content of a specific news page from the APD website.
 
@@ -54,25 +238,44 @@ async def fetch_news_page(session, page=1):
 
     :param aiohttp.ClientSession session: aiohttp session
     :param int page: page number to fetch, defaults to 1
+    :param CrawlContext context: cache, scheduler and archive of the fetch, defaults to None
     :return: the page content.
     :rtype: str
     """
+    context = context or CrawlContext()
     params = {}
     if page > 1:
         params['page'] = page - 1
-    return await fetch_text(session, APD_URL, params)
+    return await fetch_text(
+        session,
+        APD_URL,
+        params,
+        cache=context.cache,
+        ttl=constant.LISTING_TTL,
+        scheduler=context.scheduler,
+        archive=context.archive,
+    )
 
 
-async def fetch_detail_page(session, url):
+async def fetch_detail_page(session, url, context=None):
     """
     Fetch the content of a detail page.
 
     :param aiohttp.ClientSession session: aiohttp session
     :param str url: request URL
+    :param CrawlContext context: cache, scheduler and archive of the fetch, defaults to None
     :return: the page content.
     :rtype: str
     """
-    return await fetch_text(session, url)
+    context = context or CrawlContext()
+    return await fetch_text(
+        session,
+        url,
+        cache=context.cache,
+        ttl=constant.DETAIL_TTL,
+        scheduler=context.scheduler,
+        archive=context.archive,
+    )
 
 
 def extract_traffic_fatalities_page_details_link(news_page):
@@ -112,6 +315,37 @@ def extract_traffic_fatalities_page_details_link(news_page):
     return compact_matches
 
 
+def extract_publication_dates(news_page):
+    """
+    Extract the publication dates of the news from the news page.
+
+    Each news of the news page is listed along with the date it was published on.
+
+    :param str news_page: html content of the new pages
+    :return: a list of (link, publication date) tuples.
+    :rtype: list
+    """
+    publication_dates = []
+    for row in NEWS_ROW_PATTERN.findall(news_page):
+        date = PUBLICATION_DATE_PATTERN.search(row)
+        link = NEWS_LINK_PATTERN.search(row)
+        if date and link:
+            publication_dates.append((link.group(1), datetime.date.fromisoformat(date.group(1))))
+    return publication_dates
+
+
+def count_news_pages(news_page):
+    """
+    Read the number of news pages from the pager of a news page.
+
+    :param str news_page: html content of the new pages
+    :return: the number of news pages, or 0 if the pager cannot be found.
+    :rtype: int
+    """
+    match = PAGER_PATTERN.search(news_page)
+    return int(match.group(1)) if match else 0
+
+
 def generate_detail_page_urls(titles):
     """
     Generate the full URLs of the fatality detail pages.
@@ -150,14 +384,19 @@ def has_next(news_page):
     return bool(element)
 
 
-def parse_page(page, url, dump=False):
+def parse_detail_page(page, url, dump=False, tiered=False):
     """
     Parse the page using all parsing methods available.
 
+    In tiered mode, the article extractors of the fields found in the twitter metadata are skipped.
+
     :param str page: the content of the fatality page
     :param str url: detail page URL
-    :return: a dictionary representing a fatality.
-    :rtype: dict
+    :param bool dump: dump reports with parsing issues
+    :param bool tiered: skip the article extractors of the fields found in the twitter metadata
+    :return: the parsed report, whether the twitter metadata was complete enough to skip all the skippable article
+        extractors, and the parsing errors.
+    :rtype: ParsedPage
     """
     report = model.Report(case='19-123456')
 
@@ -166,7 +405,7 @@ def parse_page(page, url, dump=False):
     report.update(twitter_report)
 
     # Parse the page.
-    article_report, artricle_err = article.parse_content(page)
+    article_report, artricle_err = article.parse_content(page, twitter_report if tiered else None)
     report.update(article_report)
     if twitter_err or artricle_err:  # pragma: no cover
         twitter_err_str = f'\nTwitter fields:\n\t * ' + "\n\t * ".join(twitter_err) if twitter_err else ''
@@ -175,124 +414,105 @@ def parse_page(page, url, dump=False):
 
         # Dump the file.
         if dump:
-            dumpr_dir = Path(constant.DUMP_DIR)
-            dumpr_dir.mkdir(parents=True, exist_ok=True)
-            dump_file_name = url.split('/')[-1]
-            dump_file = dumpr_dir / dump_file_name
-            dump_file.write_text(page)
+            dump_page(page, url)
+
+    return ParsedPage(report, tiered and article.is_complete(twitter_report), twitter_err + artricle_err)
+
+
+def dump_page(page, url):
+    """
+    Dump a page with parsing issues.
+
+    :param str page: the content of the fatality page
+    :param str url: detail page URL
+    """
+    dumpr_dir = Path(constant.DUMP_DIR)
+    dumpr_dir.mkdir(parents=True, exist_ok=True)
+    dump_file_name = url.split('/')[-1]
+    dump_file = dumpr_dir / dump_file_name
+    dump_file.write_text(page)
+
+
+def parse_page(page, url, dump=False):
+    """
+    Parse the page using all parsing methods available.
+
+    :param str page: the content of the fatality page
+    :param str url: detail page URL
+    :return: a dictionary representing a fatality.
+    :rtype: dict
+    """
+    return parse_detail_page(page, url, dump).report
+
 
-    return report
+def init_worker():
+    """
+    Initialize a parsing worker process.
+
+    Parse a sample page once, to load the lazily initialized parts of the parsing libraries (i.e. the `dateparser`
+    language data) before the first real page comes in.
+    """
+    article.parse_content('<p><strong>Case:</strong> 19-123456</p>'
+                          '<p><strong>Date:</strong> January 1, 2019</p>'
+                          '<p><strong>Time:</strong> 1:00 a.m.</p>')
 
 
 @retry()
-async def fetch_and_parse(session, url, dump=False):
+async def fetch_and_parse(session, url, dump=False, context=None):
     """
     Parse a fatality page from a URL.
 
+    The page is not parsed again if an identical page was already parsed by the same parser.
+
     :param aiohttp.ClientSession session: aiohttp session
     :param str url: detail page URL
+    :param bool dump: dump reports with parsing issues
+    :param CrawlContext context: resources shared by the fetches and the parsing of the pages, defaults to None
     :return: a dictionary representing a fatality.
     :rtype: dict
     """
+    context = context or CrawlContext()
+    memo, tiered, progress = context.memo, context.tiered, context.progress
+
     # Retrieve the page.
-    page = await fetch_detail_page(session, url)
+    page = await fetch_detail_page(session, url, context)
     if not page:
         raise ValueError(f'The URL {url} returned a 0-length content.')
 
-    # Parse it.
-    report = parse_page(page, url, dump)
-    if not report:
+    # Parse it, unless an identical page was already parsed.
+    parsed = memo.get(page, tiered) if memo else None
+    memoized = parsed is not None
+    if memoized:
+        logger.debug(f'Reusing the report parsed from an identical page for {url}.')
+        if parsed.errors and dump:
+            dump_page(page, url)
+    else:
+        parsed = await parse_detail_page_in(context.executor, page, url, dump, tiered)
+        if memo:
+            memo.set(page, parsed.report, parsed.short_circuited, parsed.errors, tiered)
+    progress['short_circuited'] = progress.get('short_circuited', 0) + int(parsed.short_circuited)
+    progress['memoized'] = progress.get('memoized', 0) + int(memoized)
+    if not parsed.report:
         raise ValueError(f'No data could be extracted from the page {url}.')
 
     # Add the report link.
-    report.link = url
+    parsed.report.link = url
 
-    return report
+    return parsed.report
 
 
-async def async_retrieve(pages=-1, from_=None, to=None, attempts=1, backoff=1, dump=False):
+async def parse_detail_page_in(executor, page, url, dump=False, tiered=False):
     """
-    Retrieve fatality data.
+    Parse a detail page in an executor.
 
-    :param str pages: number of pages to retrieve or -1 for all
-    :param str from_: the start date
-    :param str to: the end date
-    :param int attempts: number of attempts per report
-    :param int backoff: initial backoff time (second)
+    :param concurrent.futures.Executor executor: executor parsing the page, or `None` to parse it in the event loop
+    :param str page: the content of the fatality page
+    :param str url: detail page URL
     :param bool dump: dump reports with parsing issues
-    :return: the list of fatalities and the number of pages that were read.
-    :rtype: tuple
-    """
-    res = {}
-    page = 1
-    has_entries = False
-    no_date_within_range_count = 0
-    from_date = date_utils.from_date(from_)
-    to_date = date_utils.to_date(to)
-
-    logger.debug(f'Retrieving fatalities from {from_date} to {to_date}.')
-
-    async with aiohttp.ClientSession() as session:
-        while True:
-            # Fetch the news page.
-            logger.info(f'Fetching page {page}...')
-            try:
-                news_page = await fetch_news_page(session, page)
-            except Exception:
-                raise ValueError(f'Cannot retrieve news page #{page}.')
-
-            # Looks for traffic fatality links.
-            page_details_links = extract_traffic_fatalities_page_details_link(news_page)
-
-            # Generate the full URL for the links.
-            links = generate_detail_page_urls(page_details_links)
-            logger.debug(f'{len(links)} fatality page(s) to process.')
-
-            # Fetch and parse each link.
-            tasks = [
-                fetch_and_parse.retry_with(
-                    stop=stop_after_attempt(attempts),
-                    wait=wait_exponential(multiplier=backoff),
-                    reraise=True,
-                )(session, link, dump) for link in links
-            ]
-            page_res = await asyncio.gather(*tasks)
-
-            if page_res:
-                # If the page contains fatalities, ensure all of them happened within the specified time range.
-                entries_in_time_range = [
-                    entry for entry in page_res if date_utils.is_between(entry.date, from_date, to_date)
-                ]
-
-                # If 2 pages in a row:
-                #   1) contain results
-                #   2) but none of them contain dates within the time range
-                #   3) and we did not collect any valid entries
-                # Then we can stop the operation.
-                past_entries = all([date_utils.is_before(entry.date, from_date) for entry in page_res])
-                if from_ and past_entries and not has_entries:
-                    no_date_within_range_count += 1
-                if no_date_within_range_count > 1:
-                    logger.debug(f'{len(entries_in_time_range)} fatality page(s) within the specified time range.')
-                    break
-
-                # Check whether we found entries in the previous pages.
-                if not has_entries:
-                    has_entries = not has_entries and bool(entries_in_time_range)
-                logger.debug(f'{len(entries_in_time_range)} fatality page(s) is/are within the specified time range.')
-
-                # If there are none in range, we do not need to search further, and we can discard the results.
-                if has_entries and not entries_in_time_range:
-                    logger.debug(f'There are no data within the specified time range on page {page}.')
-                    break
-
-                # Store the results if the ID number is new.
-                res.update({entry.case: entry for entry in entries_in_time_range if entry.case not in res})
-
-            # Stop if there is no further pages.
-            if not has_next(news_page) or page >= pages > 0:
-                break
-
-            page += 1
-
-    return list(res.values()), page
+    :param bool tiered: skip the article extractors of the fields found in the twitter metadata
+    :return: the parsed page.
+    :rtype: ParsedPage
+    """
+    if not executor:
+        return parse_detail_page(page, url, dump, tiered)
+    return await asyncio.get_event_loop().run_in_executor(executor, parse_detail_page, page, url, dump, tiered)
@@ -0,0 +1,156 @@
+"""
+Define the page archive.
+
+The archive is an append-only container storing the raw fetched pages as WARC-like response records. Each record is
+compressed as a separate gzip member, which keeps the whole file a valid gzip stream, while allowing to decompress a
+single record from its offset.
+
+A side index, stored next to the archive with an `.idx` suffix, maps each URL to the offset and length of its latest
+record, one JSON object per line.
+"""
+from collections import namedtuple
+import datetime
+import gzip
+from http.client import responses
+import json
+from pathlib import Path
+import uuid
+
+ArchivedPage = namedtuple('ArchivedPage', ['url', 'status', 'headers', 'body', 'date'])
+
+# The headers describing the transfer of the original response do not apply to the archived body.
+SKIPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+def to_record(url, status, headers, body, date):
+    """
+    Build a WARC-like response record.
+
+    :param str url: page URL
+    :param int status: HTTP status code
+    :param dict headers: response headers
+    :param str body: response body
+    :param str date: fetch time in ISO 8601 format
+    :return: the record.
+    :rtype: bytes
+    """
+    payload = body.encode()
+    reason = responses.get(status, '')
+    http_headers = [f'HTTP/1.1 {status} {reason}']
+    http_headers += [f'{k}: {v}' for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS]
+    http_headers += [f'Content-Length: {len(payload)}']
+    block = '\r\n'.join(http_headers).encode() + b'\r\n\r\n' + payload
+    warc_headers = [
+        'WARC/1.0',
+        'WARC-Type: response',
+        f'WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>',
+        f'WARC-Date: {date}',
+        f'WARC-Target-URI: {url}',
+        'Content-Type: application/http; msgtype=response',
+        f'Content-Length: {len(block)}',
+    ]
+    return '\r\n'.join(warc_headers).encode() + b'\r\n\r\n' + block + b'\r\n\r\n'
+
+
+def parse_headers(raw_headers):
+    """
+    Parse a block of headers.
+
+    :param bytes raw_headers: the headers, one per line
+    :return: the first line and the headers.
+    :rtype: tuple(str, dict)
+    """
+    lines = raw_headers.decode().split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+    return lines[0], headers
+
+
+def from_record(record):
+    """
+    Parse a WARC-like response record.
+
+    :param bytes record: the record
+    :return: the archived page.
+    :rtype: ArchivedPage
+    """
+    raw_warc_headers, block = record.split(b'\r\n\r\n', 1)
+    _, warc_headers = parse_headers(raw_warc_headers)
+    block = block[:int(warc_headers['Content-Length'])]
+    raw_http_headers, payload = block.split(b'\r\n\r\n', 1)
+    status_line, http_headers = parse_headers(raw_http_headers)
+    return ArchivedPage(
+        url=warc_headers['WARC-Target-URI'],
+        status=int(status_line.split()[1]),
+        headers=http_headers,
+        body=payload.decode(),
+        date=warc_headers['WARC-Date'],
+    )
+
+
+class PageArchive():
+    """Archive the raw fetched pages."""
+
+    def __init__(self, path):
+        """
+        Initialize the archive.
+
+        :param str path: path of the archive file
+        """
+        self.path = Path(path)
+        self.index_path = self.path.with_name(f'{self.path.name}.idx')
+        self.index = {}
+        self.load_index()
+
+    def __contains__(self, url):
+        """Return `True` if the archive contains a page."""
+        return url in self.index
+
+    def load_index(self):
+        """Load the index of the archive."""
+        self.index = {}
+        if not self.index_path.exists():
+            return
+        with self.index_path.open() as f:
+            for line in f:
+                entry = json.loads(line)
+                self.index[entry['url']] = entry
+
+    def write(self, url, status, headers, body):
+        """
+        Append a page to the archive.
+
+        :param str url: page URL
+        :param int status: HTTP status code
+        :param dict headers: response headers
+        :param str body: response body
+        :return: the offset of the record within the archive.
+        :rtype: int
+        """
+        date = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+        member = gzip.compress(to_record(url, status, headers, body, date))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open('ab') as f:
+            f.seek(0, 2)
+            offset = f.tell()
+            f.write(member)
+        entry = {'url': url, 'offset': offset, 'length': len(member), 'status': status, 'date': date}
+        with self.index_path.open('a') as f:
+            f.write(json.dumps(entry) + '\n')
+        self.index[url] = entry
+        return offset
+
+    def read(self, url):
+        """
+        Read the latest archived version of a page.
+
+        :param str url: page URL
+        :return: the archived page or `None` if the page is not in the archive.
+        :rtype: ArchivedPage
+        """
+        entry = self.index.get(url)
+        if not entry:
+            return None
+        with self.path.open('rb') as f:
+            f.seek(entry['offset'])
+            member = f.read(entry['length'])
+        return from_record(gzip.decompress(member))
@@ -10,19 +10,91 @@ from scrapd.core import regex
 from scrapd.core import twitter
 from scrapd.core.constant import Fields
 
+# HTML parsers building the BeautifulSoup trees, from the fastest to the slowest. The `lxml` parser is C-backed but
+# optional, while `html.parser` ships with Python.
+HTML_ENGINES = ('lxml', 'html.parser')
 
-def to_soup(html):
+
+def detect_html_engine():
+    """
+    Detect the fastest HTML parser available.
+
+    :return: the name of the HTML parser.
+    :rtype: str
+    """
+    return next(engine for engine in HTML_ENGINES if bs4.builder.builder_registry.lookup(engine))
+
+
+HTML_ENGINE = detect_html_engine()
+
+# Fields of a report for which the article extractors can be skipped, when they are already known.
+SKIPPABLE_FIELDS = (Fields.CRASH, Fields.DATE, Fields.FATALITIES, Fields.LOCATION, Fields.TIME)
+
+# Marker of the deceased fields, which the notes follow.
+DECEASED_MARKER = 'Deceased'
+
+# Markers delimiting the regions of a detail page which contain the fields.
+HEAD_END_MARKER = '</title>'
+BODY_START_MARKER = 'class="node node-news-release'
+BODY_END_MARKER = 'class="service-links"'
+
+
+def slice_page(page):
+    """
+    Extract the regions of a detail page which contain the fields.
+
+    The fields are either in the metadata at the top of the page head, or in the body of the news release. The rest of
+    the page (scripts, navigation, footer, etc.) is discarded. The whole page is returned if the body of the news
+    release cannot be located.
+
+    :param str page: the content of the fatality page
+    :return: the regions of the page containing the fields.
+    :rtype: str
+    """
+    body_start = page.find(BODY_START_MARKER)
+    if body_start < 0:
+        return page
+    body_start = page.rfind('<', 0, body_start)
+
+    # The body of the news release ends with the sharing links.
+    body_end = page.find(BODY_END_MARKER, body_start)
+    body_end = page.rfind('<', body_start, body_end) if body_end >= 0 else len(page)
+
+    # Keep the head until the title, which follows the metadata.
+    head_end = page.find(HEAD_END_MARKER, 0, body_start)
+    head_end = head_end + len(HEAD_END_MARKER) if head_end >= 0 else body_start
+
+    return page[:head_end] + page[body_start:body_end]
+
+
+def to_soup(html, engine=None):
     """
     Create a beautiful soup object from a HTML string.
 
     :param string html: represents a HTML document
+    :param str engine: HTML parser building the tree, defaults to `HTML_ENGINE`
     :return: A BeautifulSoup object.
     :rtype: bs4.BeautifulSoup
     """
-    soup = bs4.BeautifulSoup(html, 'html.parser')
+    soup = bs4.BeautifulSoup(html, engine or HTML_ENGINE)
     return soup
 
 
+def to_deceased_soup(page):
+    """
+    Create a beautiful soup object from a detail page, if it contains a deceased field.
+
+    Only the deceased and notes fields are extracted from the soup, which is the slowest step of the parsing.
+
+    :param str page: the normalized content of the fatality page
+    :return: A BeautifulSoup object, or `None` if the page does not contain any deceased field.
+    :rtype: bs4.BeautifulSoup
+    """
+    if DECEASED_MARKER not in page:
+        return None
+    return to_soup(page.replace("<br>", "</br>"))
+
+
 def get_deceased_tag(soup):
     """
     Get the tag with information about one or more deceased people.
@@ -35,7 +107,7 @@ def get_deceased_tag(soup):
     """
 
     def starts_with_deceased(tag):
-        return tag.get_text().strip().startswith("Deceased")
+        return tag.get_text().strip().startswith(DECEASED_MARKER)
 
     answers = []
     first = soup.find(starts_with_deceased)
@@ -106,47 +178,66 @@ def parse_deceased_field(soup):
     return fatalities, errors
 
 
-def parse_content(page):
+def is_complete(report):
+    """
+    Return `True` if a report already contains all the fields the article extractors could skip.
+
+    :param model.Report report: the report to check
+    :return: `True` if all the skippable fields are set, `False` otherwise.
+    :rtype: bool
+    """
+    return bool(report) and all(getattr(report, field) for field in SKIPPABLE_FIELDS)
+
+
+def parse_content(page, known=None):
     """
     Parse the detail page to extract fatality information.
 
+    The fields which are already set in the `known` report are not extracted again. The case number and the notes,
+    which are only available in the article, are always extracted. The page is only converted to a BeautifulSoup object
+    if it contains a deceased field.
+
     :param str news_page: the content of the fatality page
+    :param model.Report known: report containing the fields which do not need to be extracted, defaults to None
     :return: a dictionary representing a fatality and a list of errors.
     :rtype: dict, list
     """
     d = {}
     parsing_errors = []
+    known_fields = {field: getattr(known, field) for field in SKIPPABLE_FIELDS if known and getattr(known, field)}
+
+    # Normalize the regions of the page containing the fields.
+    normalized_detail_page = unicodedata.normalize("NFKD", slice_page(page))
 
-    # Normalize the page.
-    normalized_detail_page = unicodedata.normalize("NFKD", page)
+    # Extract the fields.
+    fields = regex.scan(normalized_detail_page, (Fields.CASE, Fields.CRASH, Fields.DATE, Fields.LOCATION, Fields.TIME))
 
     # Parse the `Case` field.
-    d[Fields.CASE] = regex.match_case_field(normalized_detail_page)
+    d[Fields.CASE] = fields[Fields.CASE]
     if not d.get(Fields.CASE):
         raise ValueError('a case number is mandatory')
 
     # Parse the `Date` field.
-    d[Fields.DATE] = regex.match_date_field(normalized_detail_page)
+    d[Fields.DATE] = known_fields.get(Fields.DATE) or regex.parse_date_field(fields[Fields.DATE])
     if not d.get(Fields.DATE):
         raise ValueError('a date is mandatory')
 
     # Parse the `Crashes` field.
-    crash_str = regex.match_crash_field(normalized_detail_page)
+    crash_str = known_fields.get(Fields.CRASH) or fields[Fields.CRASH]
     if crash_str:
         d[Fields.CRASH] = crash_str
     else:
         parsing_errors.append("could not retrieve the crash number")
 
     # Parse the `Time` field.
-    time_str = regex.match_time_field(normalized_detail_page)
-    time = date_utils.parse_time(time_str)
+    time = known_fields.get(Fields.TIME) or date_utils.parse_time(fields[Fields.TIME])
     if time:
         d[Fields.TIME] = time
     else:
         parsing_errors.append("could not retrieve the crash time")
 
     # Parse the location field.
-    location_str = regex.match_location_field(normalized_detail_page)
+    location_str = known_fields.get(Fields.LOCATION) or fields[Fields.LOCATION]
     if location_str:
         d[Fields.LOCATION] = location_str.strip()
     else:
@@ -156,17 +247,20 @@ def parse_content(page):
     report, err = twitter.to_report(d)
     parsing_errors.extend(err)
 
-    # Convert the page to a BeautifulSoup object.
-    soup = to_soup(normalized_detail_page.replace("<br>", "</br>"))
+    # Convert the page to a BeautifulSoup object, only if it contains the deceased and notes fields which need it.
+    soup = to_deceased_soup(normalized_detail_page)
 
-    # Parse the `Deceased` field.
-    deceased_fields, err = parse_deceased_field(soup)
-    if deceased_fields:
-        report.fatalities = deceased_fields
-        parsing_errors.extend(err)
+    # Parse the `Deceased` field, unless the fatalities are known.
+    if known_fields.get(Fields.FATALITIES):
+        deceased_fields = get_deceased_tag(soup) if soup else []
     else:
-        parsing_errors.append("could not retrieve the deceased information")
-    report.compute_fatalities_age()
+        deceased_fields, err = parse_deceased_field(soup) if soup else ([], [])
+        if deceased_fields:
+            report.fatalities = deceased_fields
+            parsing_errors.extend(err)
+        else:
+            parsing_errors.append("could not retrieve the deceased information")
+        report.compute_fatalities_age()
 
     # Fill in Notes from Details page
     if deceased_fields:
@@ -0,0 +1,144 @@
+"""
+Define the HTTP response cache.
+
+The responses are stored on disk, one JSON file per URL, along with their validators (`ETag` and `Last-Modified`
+headers). A fresh entry is served directly from the disk, while a stale one is revalidated by issuing a conditional
+request.
+"""
+from dataclasses import asdict
+from dataclasses import dataclass
+import hashlib
+import json
+from pathlib import Path
+import shutil
+import time
+from urllib.parse import urlencode
+
+from loguru import logger
+
+from scrapd.core import constant
+from scrapd.core.file_utils import atomic_write
+
+
+@dataclass
+class CacheEntry:
+    """Represent a cached response."""
+
+    url: str
+    body: str
+    etag: str = ''
+    last_modified: str = ''
+    stored_at: float = 0.0
+
+    def is_fresh(self, ttl):
+        """
+        Return `True` if the entry is younger than `ttl`.
+
+        :param int ttl: time to live (second)
+        :return: `True` if the entry can be served without revalidation.
+        :rtype: bool
+        """
+        return time.time() - self.stored_at < ttl
+
+    def conditional_headers(self):
+        """
+        Build the headers to revalidate the entry.
+
+        :return: the headers of a conditional request.
+        :rtype: dict
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache():
+    """Store HTTP responses on disk."""
+
+    def __init__(self, directory=constant.CACHE_DIR):
+        """
+        Initialize the cache.
+
+        :param str directory: cache directory
+        """
+        self.directory = Path(directory)
+
+    @staticmethod
+    def cache_url(url, params=None):
+        """
+        Build the URL used as the cache key.
+
+        :param str url: request URL
+        :param dict params: request parameters, defaults to None
+        :return: the URL including its query string.
+        :rtype: str
+        """
+        if not params:
+            return url
+        return f'{url}?{urlencode(sorted(params.items()))}'
+
+    def path(self, cache_url):
+        """
+        Compute the path of the file storing an entry.
+
+        :param str cache_url: URL including its query string
+        :return: the path of the cache file.
+        :rtype: pathlib.Path
+        """
+        digest = hashlib.sha256(cache_url.encode()).hexdigest()
+        return self.directory / f'{digest}.json'
+
+    def get(self, url, params=None):
+        """
+        Retrieve an entry.
+
+        :param str url: request URL
+        :param dict params: request parameters, defaults to None
+        :return: the cached entry or `None` if there is no valid entry.
+        :rtype: CacheEntry
+        """
+        cache_file = self.path(self.cache_url(url, params))
+        try:
+            return CacheEntry(**json.loads(cache_file.read_text()))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError) as e:
+            logger.debug(f'Ignoring corrupted cache entry {cache_file}: {e}')
+            return None
+
+    def set(self, url, params, body, headers=None):
+        """
+        Store a response.
+
+        :param str url: request URL
+        :param dict params: request parameters
+        :param str body: response body
+        :param dict headers: response headers, defaults to None
+        :return: the new entry.
+        :rtype: CacheEntry
+        """
+        headers = headers or {}
+        entry = CacheEntry(
+            url=self.cache_url(url, params),
+            body=body,
+            etag=headers.get('ETag', ''),
+            last_modified=headers.get('Last-Modified', ''),
+        )
+        self.save(entry)
+        return entry
+
+    def save(self, entry):
+        """
+        Write an entry to disk, refreshing its storage time.
+
+        :param CacheEntry entry: the entry to write
+        """
+        entry.stored_at = time.time()
+        atomic_write(self.path(entry.url), json.dumps(asdict(entry)))
+
+    def purge(self):
+        """Remove all the entries."""
+        shutil.rmtree(self.directory, ignore_errors=True)
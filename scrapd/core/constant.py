@@ -26,3 +26,47 @@ class Fields():
 
 
 DUMP_DIR = '.dump'
+
+# Parsed dates and times.
+DATE_CACHE_SIZE = 4096
+
+# HTTP response cache.
+CACHE_DIR = '.scrapd/cache'
+DETAIL_TTL = 30 * 24 * 60 * 60
+LISTING_TTL = 10 * 60
+
+# Parsed detail pages.
+MEMO_DIR = '.scrapd/memo'
+
+# Index of the news pages.
+INDEX_FILE = '.scrapd/index.json'
+
+# Maximum delay between a crash and the publication of its report (day).
+PUBLICATION_LAG = 90
+
+# Incremental crawls.
+STATE_FILE = '.scrapd/state.json'
+
+# HTTP connections.
+DNS_CACHE_TTL = 5 * 60
+KEEPALIVE_TIMEOUT = 60.0
+LIMIT_PER_HOST = 32
+
+# Request deadlines (second).
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 30.0
+
+# Request scheduling.
+AIMD_DECREASE = 0.5
+AIMD_INITIAL = 2
+AIMD_LATENCY_TOLERANCE = 2.0
+ERROR_STATUSES = range(500, 600)
+HEDGE_MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 95
+LATENCY_WINDOW = 200
+MAX_IN_FLIGHT = 8
+MAX_THROTTLED = 3
+PREFETCH = 1
+RATE = 5.0
+RETRY_AFTER = 1.0
+THROTTLED_STATUSES = (429, 503)
@@ -0,0 +1,546 @@
+"""Define the module crawling the news pages and the fatality detail pages of the APD website."""
+import asyncio
+import datetime
+from urllib.parse import urljoin
+
+from loguru import logger
+from tenacity import stop_after_attempt
+from tenacity import wait_exponential
+
+from scrapd.core import apd
+from scrapd.core import constant
+from scrapd.core import date_utils
+
+
+async def cancel_tasks(tasks):
+    """
+    Cancel tasks and wait for them to complete.
+
+    :param list tasks: the tasks to cancel
+    """
+    tasks = list(tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def prefetch_news_pages(session, prefetched, page, count, pages=-1, context=None):
+    """
+    Schedule the fetching of the news pages following the current one.
+
+    :param aiohttp.ClientSession session: aiohttp session
+    :param dict prefetched: the tasks fetching the news pages, indexed by page number
+    :param int page: current page number
+    :param int count: number of pages to prefetch
+    :param int pages: number of pages to retrieve or -1 for all
+    :param apd.CrawlContext context: resources shared by the fetches and the parsing of the pages, defaults to None
+    """
+    last_page = page + count if pages <= 0 else min(page + count, pages)
+    for next_page in range(page + 1, last_page + 1):
+        if next_page not in prefetched:
+            news_page = apd.fetch_news_page(session, next_page, context)
+            prefetched[next_page] = asyncio.ensure_future(news_page)
+
+
+def count_pages_ahead(news_page, page, prefetch, pages=-1, fanout=False):
+    """
+    Count the news pages to fetch ahead of the current one.
+
+    :param str news_page: html content of the current news page
+    :param int page: current page number
+    :param int prefetch: number of news pages to fetch ahead
+    :param int pages: number of pages to retrieve or -1 for all
+    :param bool fanout: fetch all the following news pages at once, up to the last one, defaults to False
+    :return: the number of news pages to fetch ahead.
+    :rtype: int
+    """
+    if not fanout:
+        return prefetch
+    last_page = pages if pages > 0 else apd.count_news_pages(news_page)
+    return max(last_page - page, prefetch)
+
+
+async def retrieve_news_page(session, page, prefetched, context=None, index=None):
+    """
+    Retrieve a news page, using the prefetched one if available.
+
+    :param aiohttp.ClientSession session: aiohttp session
+    :param int page: page number to retrieve
+    :param dict prefetched: the tasks fetching the news pages, indexed by page number
+    :param apd.CrawlContext context: resources shared by the fetches and the parsing of the pages, defaults to None
+    :param index.PageIndex index: index of the news pages, updated with the retrieved page, defaults to None
+    :return: the page content.
+    :rtype: str
+    """
+    try:
+        if page in prefetched:
+            news_page = await prefetched.pop(page)
+        else:
+            news_page = await apd.fetch_news_page(session, page, context)
+    except Exception:
+        raise ValueError(f'Cannot retrieve news page #{page}.')
+
+    if index is not None:
+        index.update(page, apd.extract_publication_dates(news_page))
+    return news_page
+
+
+def is_published_before(news_page, date, lag=datetime.timedelta(0)):
+    """
+    Return `True` if a news page lists a news published before a date.
+
+    :param str news_page: html content of the new pages
+    :param datetime.date date: the date to compare the publication dates to
+    :param datetime.timedelta lag: delay added to the date, defaults to 0
+    :return: `True` if a news was published on or before `date + lag`, or if the publication dates cannot be found.
+    :rtype: bool
+    """
+    publication_dates = [publication_date for _, publication_date in apd.extract_publication_dates(news_page)]
+    return not publication_dates or min(publication_dates) - lag <= date
+
+
+def guess_news_pages(index, to_date, lag):
+    """
+    Guess the news pages to check first when seeking the first news page which may contain reports up to a date.
+
+    :param index.PageIndex index: index of the news pages, defaults to None
+    :param datetime.date to_date: the end date
+    :param datetime.timedelta lag: maximum delay between a crash and the publication of its report
+    :return: the page guessed from the index followed by its neighbors, or the first page without index.
+    :rtype: list
+    """
+    guess = index.guess(to_date, lag) if index is not None else None
+    return [guess, guess - 1, guess + 1] if guess else [1]
+
+
+async def seek_news_page(session, to_date, lag, prefetched, pages=-1, context=None, index=None):
+    """
+    Find the first news page which may contain reports up to a date.
+
+    The news pages are sorted from the most recent to the oldest: the first news page listing a news published before
+    the end date (lag included) is located by bisecting the range of news pages given by the pager. If an index is
+    provided, the page it guesses and its neighbors are checked first, which usually avoids the bisection. The news
+    pages fetched along the way are kept in `prefetched`.
+
+    :param aiohttp.ClientSession session: aiohttp session
+    :param datetime.date to_date: the end date
+    :param datetime.timedelta lag: maximum delay between a crash and the publication of its report
+    :param dict prefetched: the tasks fetching the news pages, indexed by page number
+    :param int pages: number of pages to retrieve or -1 for all
+    :param apd.CrawlContext context: resources shared by the fetches and the parsing of the pages, defaults to None
+    :param index.PageIndex index: index of the news pages, updated with the fetched pages, defaults to None
+    :return: the number of the first news page to crawl.
+    :rtype: int
+    """
+    # The pages up to `low` do not list any news published before the end date, and the page `high` does or is the last
+    # page to retrieve.
+    low, high = 0, pages if pages > 0 else None
+    guesses = guess_news_pages(index, to_date, lag)
+    while high is None or high - low > 1:
+        page = next((page for page in guesses if low < page and (high is None or page < high)), None)
+        page = page or (low + high) // 2
+        if page not in prefetched:
+            prefetched[page] = asyncio.ensure_future(apd.fetch_news_page(session, page, context))
+        news_page = await prefetched[page]
+
+        # Guess again if the news moved since they were indexed.
+        if index is not None and index.update(page, apd.extract_publication_dates(news_page)):
+            guesses = guess_news_pages(index, to_date, lag)
+
+        if is_published_before(news_page, to_date, lag):
+            high = page
+        elif high is None:
+            low, high = page, max(apd.count_news_pages(news_page), page + 1)
+        else:
+            low = page
+    logger.debug(f'The news published before {to_date} start on page {high}.')
+    return high
+
+
+class DateFilter():
+    """
+    Filter the reports of the news pages by date.
+
+    The news pages are sorted from the most recent to the oldest. The filter also detects when the following pages
+    cannot contain any report within the time range anymore.
+    """
+
+    def __init__(self, from_date, to_date, has_from=True, lag=None):
+        """
+        Initialize the filter.
+
+        :param datetime.date from_date: the start date
+        :param datetime.date to_date: the end date
+        :param bool has_from: `True` if the start date was specified by the user
+        :param datetime.timedelta lag: maximum delay between a crash and the publication of its report, defaults to
+            None. When set, the reports are also filtered by their publication date, before being fetched.
+        """
+        self.from_date = from_date
+        self.to_date = to_date
+        self.has_from = has_from
+        self.lag = lag
+        self.has_entries = False
+        self.no_date_within_range_count = 0
+        self.done = False
+
+    def accepts(self, report):
+        """
+        Return `True` if the report is within the time range.
+
+        :param model.Report report: the report to check
+        :return: `True` if the report is within the time range, `False` otherwise.
+        :rtype: bool
+        """
+        return date_utils.is_between(report.date, self.from_date, self.to_date)
+
+    def may_accept(self, publication_date):
+        """
+        Return `False` if a report published at a given date cannot be within the time range.
+
+        A crash happens before the publication of its report, and at most `lag` before.
+
+        :param datetime.date publication_date: the publication date of the report, or `None` if it is unknown
+        :return: `False` if the report is outside of the time range, `True` otherwise.
+        :rtype: bool
+        """
+        if self.lag is None or not publication_date:
+            return True
+        return self.from_date <= publication_date and publication_date - self.lag <= self.to_date
+
+    def prefilter(self, links, publication_dates):
+        """
+        Filter the detail page links of a news page by publication date.
+
+        The news are sorted from the most recent to the oldest: once a news was published before the start date, the
+        following pages cannot contain any report within the time range anymore.
+
+        :param list links: the detail page URLs
+        :param dict publication_dates: the publication date of the news, by URL
+        :return: the links of the reports which may be within the time range.
+        :rtype: list
+        """
+        if self.lag is None:
+            return links
+        if self.has_from and any(date < self.from_date for date in publication_dates.values()):
+            self.done = True
+        return [link for link in links if self.may_accept(publication_dates.get(link))]
+
+    def passed(self, report):
+        """
+        Return `True` if the reports listed after a given one on the same news page cannot be within the time range.
+
+        The news are sorted from the most recent to the oldest: once a report happened before the start date, the
+        following ones on the page are considered out of the time range. Whether the next pages are walked is still
+        decided by :meth:`filter`.
+
+        :param model.Report report: the report to check
+        :return: `True` if the report happened before the start date specified by the user, `False` otherwise.
+        :rtype: bool
+        """
+        return self.has_from and date_utils.is_before(report.date, self.from_date)
+
+    def filter(self, page_res):
+        """
+        Filter the reports of a news page.
+
+        :param list page_res: the reports of a news page
+        :return: the reports within the time range.
+        :rtype: list
+        """
+        if not page_res:
+            return []
+
+        # If the page contains fatalities, ensure all of them happened within the specified time range.
+        entries_in_time_range = [entry for entry in page_res if self.accepts(entry)]
+        logger.debug(f'{len(entries_in_time_range)} fatality page(s) is/are within the specified time range.')
+
+        # If 2 pages in a row:
+        #   1) contain results
+        #   2) but none of them contain dates within the time range
+        #   3) and we did not collect any valid entries
+        # Then we can stop the operation.
+        past_entries = all([date_utils.is_before(entry.date, self.from_date) for entry in page_res])
+        if self.has_from and past_entries and not self.has_entries:
+            self.no_date_within_range_count += 1
+        if self.no_date_within_range_count > 1:
+            self.done = True
+
+        # If there are none in range after finding some in the previous pages, we do not need to search further.
+        if self.has_entries and not entries_in_time_range:
+            self.done = True
+
+        # Check whether we found entries in the previous pages.
+        self.has_entries = self.has_entries or bool(entries_in_time_range)
+
+        return entries_in_time_range
+
+
+def schedule_reports(session, links, attempts=1, backoff=1, dump=False, context=None):
+    """
+    Schedule the fetching and the parsing of the fatality detail pages.
+
+    :param aiohttp.ClientSession session: aiohttp session
+    :param list links: detail page URLs
+    :param int attempts: number of attempts per report
+    :param int backoff: initial backoff time (second)
+    :param bool dump: dump reports with parsing issues
+    :param apd.CrawlContext context: resources shared by the fetches and the parsing of the pages, defaults to None
+    :return: the tasks returning the reports, by URL.
+    :rtype: dict
+    """
+    return {
+        link: asyncio.ensure_future(
+            apd.fetch_and_parse.retry_with(
+                stop=stop_after_attempt(attempts),
+                wait=wait_exponential(multiplier=backoff),
+                reraise=True,
+            )(session, link, dump, context))
+        for link in links
+    }
+
+
+async def iter_page_reports(links, tasks, reports, state=None, date_filter=None):
+    """
+    Iterate over the reports of a news page, in the order of its links.
+
+    The reports parsed from the following links in the meantime are kept by their tasks until their turn comes, which
+    makes the order of the reports independent from the order in which the detail pages are fetched. As soon as a
+    report happened before the start date, the remaining tasks of the page are cancelled along with their retries.
+
+    :param list links: the detail page URLs of the news page
+    :param dict tasks: the tasks returning the reports parsed from the new detail pages, by URL
+    :param list reports: receives the reports of the news page
+    :param state.CrawlState state: reports collected by the previous runs, defaults to None. It provides the reports of
+        the links without task, and is updated with the parsed reports.
+    :param DateFilter date_filter: filter deciding whether the following reports can be within the time range,
+        defaults to None
+    :return: an asynchronous iterator over the reports.
+    :rtype: AsyncIterator[model.Report]
+    """
+    for link in links:
+        if link in tasks:
+            report = await tasks.pop(link)
+            if state is not None:
+                state.add(report)
+        else:
+            report = state.get(link)
+        reports.append(report)
+        yield report
+
+        if date_filter is not None and date_filter.passed(report):
+            logger.debug(f'Cancelling the {len(tasks)} detail page(s) following the report {report.case}.')
+            await cancel_tasks(tasks.values())
+            return
+
+
+def is_new(report, seen):
+    """
+    Return `True` if the case number of a report was not seen before, and mark it as seen.
+
+    :param model.Report report: the report to check
+    :param set seen: the case numbers seen so far
+    :return: `True` if the case number was not seen before, `False` otherwise.
+    :rtype: bool
+    """
+    if report.case in seen:
+        return False
+    seen.add(report.case)
+    return True
+
+
+async def aiter_reports(
+        pages=-1,
+        from_=None,
+        to=None,
+        attempts=1,
+        backoff=1,
+        dump=False,
+        context=None,
+        prefetch=0,
+        state=None,
+        replay_dir=None,
+        prefilter=False,
+        seek=False,
+        index=None,
+        fanout=False,
+        timeout=None,
+        session=None,
+):
+    """
+    Retrieve fatality data, yielding each report as soon as it is available.
+
+    The reports of a news page are yielded in the order of its links, once they pass the date filter and only if their
+    case number was not yielded before.
+
+    :param str pages: number of pages to retrieve or -1 for all
+    :param str from_: the start date
+    :param str to: the end date
+    :param int attempts: number of attempts per report
+    :param int backoff: initial backoff time (second)
+    :param bool dump: dump reports with parsing issues
+    :param apd.CrawlContext context: resources shared by the fetches and the parsing of the pages, defaults to None. Its
+        `progress` receives the number of news pages read so far under the `pages` key, the number of detail pages
+        whose article extractors were all skipped under the `short_circuited` key, the number of detail pages found in
+        the memo under the `memoized` key, the number of detail pages skipped because of their publication date under
+        the `prefiltered` key, and the number of duplicate detail page links skipped under the `duplicates` key.
+    :param int prefetch: number of news pages to fetch ahead while processing the current one, defaults to 0
+    :param state.CrawlState state: reports collected by the previous runs, defaults to None. The detail pages already
+        known are not fetched again, and the crawl stops at the first news page containing only known detail pages.
+        The state is updated with the new reports.
+    :param str replay_dir: read the pages from this archive directory or page archive file instead of the APD website,
+        defaults to None
+    :param bool prefilter: skip the detail pages published outside of the time range, before fetching them, defaults
+        to False. The detail pages published up to `constant.PUBLICATION_LAG` days after the end date are kept.
+    :param bool seek: start the crawl at the first news page which may contain reports up to the end date, found by
+        bisecting the news pages, defaults to False. The news pages are still counted from the first one to honor
+        `pages`.
+    :param index.PageIndex index: index of the news pages, defaults to None. It is updated with the news pages read
+        during the crawl, and guesses the first news page to crawl when seeking.
+    :param bool fanout: fetch all the news pages up to the last one at once, instead of `prefetch` pages ahead,
+        defaults to False. The last page is given by `pages`, or by the pager of the first news page read. The news
+        pages are still processed in order.
+    :param aiohttp.ClientTimeout timeout: deadlines of the requests, defaults to the ones of
+        :func:`apd.client_timeout`
+    :param aiohttp.ClientSession session: session owned by the caller, defaults to None. It is left open, which lets
+        several crawls reuse its connections. By default, each crawl creates its own session with
+        :func:`apd.create_session`, or reads `replay_dir`.
+    :return: an asynchronous iterator over the fatalities.
+    :rtype: AsyncIterator[model.Report]
+    """
+    seen = set()
+    linked = set()
+    known_page = False
+    from_date = date_utils.from_date(from_)
+    to_date = date_utils.to_date(to)
+    lag = datetime.timedelta(days=constant.PUBLICATION_LAG) if prefilter else None
+    date_filter = DateFilter(from_date, to_date, bool(from_), lag)
+    prefetched = {}
+    tasks = {}
+    context = context or apd.CrawlContext()
+    progress = context.progress
+    progress['short_circuited'] = 0
+    progress['memoized'] = 0
+    progress['prefiltered'] = 0
+    progress['duplicates'] = 0
+
+    logger.debug(f'Retrieving fatalities from {from_date} to {to_date}.')
+
+    async with apd.open_session(session, replay_dir, timeout) as session:
+        try:
+            # Jump to the first news page which may contain reports up to the end date.
+            max_lag = datetime.timedelta(days=constant.PUBLICATION_LAG)
+            if seek and to:
+                page = await seek_news_page(session, to_date, max_lag, prefetched, pages, context, index)
+            else:
+                page = 1
+
+            while True:
+                # Fetch the news page.
+                logger.info(f'Fetching page {page}...')
+                progress['pages'] = page
+                news_page = await retrieve_news_page(session, page, prefetched, context, index)
+
+                # Looks for traffic fatality links.
+                page_details_links = apd.extract_traffic_fatalities_page_details_link(news_page)
+
+                # Generate the full URL for the links, skipping the ones already listed on the previous pages, which
+                # happens when news are published during the crawl.
+                listed_links = apd.generate_detail_page_urls(page_details_links)
+                links = [link for link in dict.fromkeys(listed_links) if link not in linked]
+                progress['duplicates'] += len(listed_links) - len(links)
+                linked.update(links)
+
+                # Skip the links published outside of the time range.
+                publication_dates = {
+                    urljoin(apd.PAGE_DETAILS_URL, link): date
+                    for link, date in apd.extract_publication_dates(news_page)
+                }
+                in_range_links = date_filter.prefilter(links, publication_dates)
+                progress['prefiltered'] += len(links) - len(in_range_links)
+                links = in_range_links
+                logger.debug(f'{len(links)} fatality page(s) to process.')
+
+                # Skip the links known from the previous runs.
+                new_links = [link for link in links if state is None or link not in state]
+                known_page = state is not None and bool(links) and not new_links
+
+                # Stop if there is no further pages, if the following pages cannot contain results within the time
+                # range, or if the next ones were all processed during the previous runs. In that case the news pages
+                # fetched ahead are cancelled right away, so that they do not delay the detail pages of this page.
+                # Otherwise, fetch the next news pages while the detail pages are being processed.
+                last_page = not apd.has_next(news_page) or page >= pages > 0 or date_filter.done or known_page
+                if last_page:
+                    await cancel_tasks(prefetched.values())
+                else:
+                    ahead = count_pages_ahead(news_page, page, prefetch, pages, fanout)
+                    prefetch_news_pages(session, prefetched, page, ahead, pages, context)
+
+                # Fetch and parse each new link.
+                tasks = schedule_reports(session, new_links, attempts, backoff, dump, context)
+                page_res = []
+
+                # Yield the results within the time range in the order of the links, if their ID number is new.
+                async for report in iter_page_reports(links, tasks, page_res, state, date_filter):
+                    if date_filter.accepts(report) and is_new(report, seen):
+                        yield report
+
+                # Detect whether the following pages can still contain results within the time range.
+                date_filter.filter(page_res)
+                if date_filter.done:
+                    logger.debug(f'There are no more data within the specified time range after page {page}.')
+                    break
+                if last_page:
+                    break
+
+                page += 1
+        finally:
+            # Discard the detail pages and the news pages fetched ahead which are not needed anymore.
+            await cancel_tasks(tasks.values())
+            await cancel_tasks(prefetched.values())
+
+            # Keep the reports parsed so far, even if the crawl failed or the caller stopped iterating.
+            if state is not None:
+                state.save()
+
+    # Complete the results with the known reports of the pages which were not walked.
+    known_reports = state.between(from_date, to_date) if known_page else []
+    for report in [report for report in known_reports if is_new(report, seen)]:
+        yield report
+
+
+def iter_reports(*args, **kwargs):
+    """
+    Retrieve fatality data, yielding each report as soon as it is available.
+
+    This is the synchronous counterpart of :func:`aiter_reports`, which runs the crawl in its own event loop. It accepts
+    the same parameters, except `session`, which would be bound to another event loop.
+
+    :return: an iterator over the fatalities.
+    :rtype: Iterator[model.Report]
+    """
+    loop = asyncio.new_event_loop()
+    reports = aiter_reports(*args, **kwargs)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(reports.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(reports.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+async def async_retrieve(*args, **kwargs):
+    """
+    Retrieve fatality data.
+
+    It accepts the same parameters as :func:`aiter_reports`.
+
+    :return: the list of fatalities and the number of pages that were read.
+    :rtype: tuple
+    """
+    context = kwargs.pop('context', None) or apd.CrawlContext()
+    res = [report async for report in aiter_reports(*args, context=context, **kwargs)]
+    return res, context.progress['pages']
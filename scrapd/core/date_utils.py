@@ -1,7 +1,70 @@
-"""Define a module to manipulate dates."""
+"""
+Define a module to manipulate dates.
+
+The dates and times are first matched against a table of the formats found in the APD bulletins. Only the ones which do
+not match any format are handed to `dateparser`, restricted to English. The results are memoized.
+"""
+import collections
 import datetime
+import functools
+import re
 
 import dateparser
+from dateparser.search import search_dates
+
+from scrapd.core.constant import DATE_CACHE_SIZE
+
+# Languages `dateparser` looks for, which saves it from detecting the language of each string.
+LANGUAGES = ['en']
+
+MONTHS = (
+    'january',
+    'february',
+    'march',
+    'april',
+    'may',
+    'june',
+    'july',
+    'august',
+    'september',
+    'october',
+    'november',
+    'december',
+)
+MONTH_NUMBERS = {name: i for i, month in enumerate(MONTHS, 1) for name in (month, month[:3])}
+MONTH_NUMBERS['sept'] = 9
+
+# Formats of the dates, e.g. "Saturday, January 5, 2019", "Jan. 5 2019", "1/5/19", "01-05-2019" or "2019-01-05".
+DATE_FORMATS = (
+    re.compile(
+        r'''
+        (?:(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*,?\s+)?  # Optional day of the week.
+        (?P<month>[a-z]+)\.?\s+                        # Name of the month.
+        (?P<day>\d{1,2}),?\s+
+        (?P<year>\d{4})
+        ''',
+        re.IGNORECASE | re.VERBOSE,
+    ),
+    re.compile(r'(?P<month>\d{1,2})([/-])(?P<day>\d{1,2})\2(?P<year>\d{4}|\d{2})'),
+    re.compile(r'(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})'),
+)
+
+# Format of the times, e.g. "5:12 p.m.", "5 PM", "05:12am" or "17:12".
+TIME_FORMAT = re.compile(
+    r'''
+    (?P<hour>\d{1,2})
+    (?::(?P<minute>\d{2}))?
+    \s*
+    (?:(?P<meridiem>[ap])\.?\s*m\.?)?
+    ''',
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# The `dateparser` settings which do not affect the dates matching the formats.
+FAST_SETTINGS = {'PREFER_DAY_OF_MONTH'}
+
+# Number of strings parsed with the formats and with `dateparser`.
+stats = collections.Counter()
 
 
 def is_before(d1, d2):
@@ -77,9 +140,9 @@ def parse_date(date, default=None, settings=None):
     """
 
     try:
-        d = dateparser.parse(date, settings=settings)
+        d = cached_parse_date(date, tuple(sorted((settings or {}).items())))
         if d:
-            return d.date()
+            return d
         raise ValueError(f'Cannot parse date: {date}')
     except Exception:
         if default:
@@ -96,8 +159,130 @@ def parse_time(time):
     :rtype: datetime.time
     """
 
-    dt = dateparser.parse(time)
-    return None if not dt else dt.time()
+    return cached_parse_time(time)
+
+
+def search_date(text):
+    """
+    Find the first date in a text.
+
+    :param str text: text containing a date
+    :return: the first date found in the text or `None`.
+    :rtype: datetime.date
+    """
+    return cached_search_date(text)
+
+
+def match_date_format(text):
+    """
+    Match a date against the formats of `DATE_FORMATS`.
+
+    Two-digit years are mapped to the range 1969-2068, like `dateparser` does.
+
+    :param str text: date
+    :return: a date object representing the date, or `None` if the text does not match any format.
+    :rtype: datetime.date
+    """
+    for date_format in DATE_FORMATS:
+        match = date_format.fullmatch(text)
+        if not match:
+            continue
+        month = match.group('month')
+        month = int(month) if month.isdigit() else MONTH_NUMBERS.get(month.lower())
+        year = int(match.group('year'))
+        if len(match.group('year')) == 2:
+            year += 1900 if year >= 69 else 2000
+        try:
+            return datetime.date(year, month, int(match.group('day')))
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def match_time_format(text):
+    """
+    Match a time against `TIME_FORMAT`.
+
+    A time without minutes must be a 12-hour time with a meridiem, and a 24-hour time followed by a meridiem keeps its
+    hour (i.e. "18:46 pm" is 18:46).
+
+    :param str text: time
+    :return: a time object representing the time, or `None` if the text does not match the format.
+    :rtype: datetime.time
+    """
+    match = TIME_FORMAT.fullmatch(text)
+    if not match:
+        return None
+    hour = int(match.group('hour'))
+    minute = int(match.group('minute') or 0)
+    meridiem = (match.group('meridiem') or '').lower()
+    if match.group('minute') is None and not (meridiem and 1 <= hour <= 12):
+        return None
+    if meridiem == 'p' and 1 <= hour < 12:
+        hour += 12
+    elif meridiem == 'a' and hour == 12:
+        hour = 0
+    elif meridiem == 'p' and hour == 0:
+        return None
+    if hour > 23 or minute > 59:
+        return None
+    return datetime.time(hour, minute)
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def cached_parse_date(date, settings=()):
+    """
+    Parse and memoize a date.
+
+    :param str date: date
+    :param tuple settings: the `dateparser` options, as sorted `(name, value)` pairs.
+    :return: a date object representing the date, or `None` if the date cannot be parsed.
+    :rtype: datetime.date
+    """
+    if FAST_SETTINGS.issuperset(name for name, _ in settings):
+        d = match_date_format(date.strip())
+        if d:
+            stats['fast'] += 1
+            return d
+    stats['fallback'] += 1
+    dt = dateparser.parse(date, languages=LANGUAGES, settings=dict(settings))
+    return dt.date() if dt else None
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def cached_parse_time(time):
+    """
+    Parse and memoize a time.
+
+    :param str time: time
+    :return: a time object representing the time, or `None` if the time cannot be parsed.
+    :rtype: datetime.time
+    """
+    t = match_time_format(time.strip())
+    if t:
+        stats['fast'] += 1
+        return t
+    stats['fallback'] += 1
+    dt = dateparser.parse(time, languages=LANGUAGES)
+    return dt.time() if dt else None
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def cached_search_date(text):
+    """
+    Find and memoize the first date in a text.
+
+    :param str text: text containing a date
+    :return: the first date found in the text or `None`.
+    :rtype: datetime.date
+    """
+    d = match_date_format(' '.join(text.split()))
+    if d:
+        stats['fast'] += 1
+        return d
+    stats['fallback'] += 1
+    dates = search_dates(text, languages=LANGUAGES)
+    return dates[0][1].date() if dates else None
 
 
 def is_between(date, from_=None, to=None):
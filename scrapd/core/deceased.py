@@ -11,9 +11,11 @@ Deceased is a special field as it contains a lot of other fields:
 - (Notes)
 """
 import calendar
+import collections
 from dataclasses import asdict
 from dataclasses import dataclass
 import re
+import time
 
 # import bs4
 from pydantic import ValidationError
@@ -22,6 +24,34 @@ from scrapd.core import date_utils
 from scrapd.core import model
 from scrapd.core.constant import Fields
 
+AGE_PATTERN = re.compile(r'([0-9]+) years')
+
+# Any DOB token found by `dob_search()` contains one of these strings.
+DOB_PATTERN = re.compile(r'dob|DOB|D\.O\.B|[bB]orn')
+
+UNIDENTIFIED_PATTERN = re.compile(
+    r'''
+    (?:                         # Non captured group
+    (Unidentified               # The "Unidentified" keyword
+    |                           # Or
+    Unknown                     # The "Unknown" keyword
+    )
+    ,?                          # Potentially a comma
+    \s                          # A whitespace
+    (?P<ethinicty>[^\s]+\s)?    # The ethinicty
+    (?P<gender>female|male)     # The gender
+    )
+    ''',
+    re.VERBOSE,
+)
+
+# Number of deceased fields parsed by each parse method, and by the classifier outcome ("ambiguous" when the field
+# could not be classified, "mispredicted" when the classified parse method failed).
+stats = collections.Counter()
+
+# Time spent in each parse method and in the classifier, in seconds.
+durations = collections.Counter()
+
 
 @dataclass
 class Name:
@@ -201,6 +231,40 @@ def dob_search(split_deceased_field):
     return dob_index
 
 
+def classify_deceased_field(deceased_field):
+    """
+    Find the first parse method which can succeed on a deceased field, without running the previous ones.
+
+    The field is inspected for the tokens the parse methods rely on (the DOB token, the pipes, the trailing date, the
+    age and the "Unidentified" keyword). A parse method is only returned when all the parse methods preceding it in
+    the chain are certain to fail.
+
+    :param str deceased_field: the deceased field from the fatality report
+    :return: the parse method to start with, or `None` if the field is ambiguous.
+    :rtype: function
+    """
+    # Only the fields containing a DOB token can be comma delimited, and only the ones containing pipes can be pipe
+    # delimited.
+    if DOB_PATTERN.search(deceased_field):
+        return parse_comma_delimited_deceased_field
+    if '|' in deceased_field:
+        return parse_pipe_delimited_deceased_field
+
+    # The space delimited fields end with the DOB.
+    raw_dob = re.split(r' |/', deceased_field)[-1].strip()
+    try:
+        date_utils.parse_date(raw_dob)
+        return parse_space_delimited_deceased_field
+    except ValueError:
+        pass
+    if AGE_PATTERN.search(deceased_field):
+        return parse_age_deceased_field
+    if UNIDENTIFIED_PATTERN.search(deceased_field):
+        return parse_unidentified
+
+    return None
+
+
 def process_deceased_field(deceased_field):
     """
     Parse the deceased field.
@@ -208,6 +272,9 @@ def process_deceased_field(deceased_field):
     At this point the deceased field, if it exists, is garbage as it contains First Name, Last Name, Ethnicity,
     Gender, D.O.B. and Notes. We need to explode this data into the appropriate fields.
 
+    The field is classified first, and the parse methods preceding the one it was classified for are skipped. If the
+    field is ambiguous, all the parse methods are tried in order.
+
     :param str deceased_field: the deceased field from the fatality report
     :return: a tuple containing a model.Fatality and a list of associated parsing errors.
     :rtype: tuple(model.Fatality, list())
@@ -221,16 +288,31 @@ def process_deceased_field(deceased_field):
         parse_unidentified,
     ]
 
+    # Skip the parse methods which cannot succeed.
+    start = time.perf_counter()
+    parse_method = classify_deceased_field(deceased_field)
+    durations['classify'] += time.perf_counter() - start
+    if parse_method:
+        parse_methods = parse_methods[parse_methods.index(parse_method):]
+    else:
+        stats['ambiguous'] += 1
+
     # Execute the parsing methods in order.
     for m in parse_methods:
+        start = time.perf_counter()
         try:
             d = m(deceased_field)
-            if isinstance(d, dict):
-                return [to_fatality(d)]
-            if isinstance(d, list):
-                return [to_fatality(entry) for entry in d]
         except (ValueError, IndexError):
-            pass
+            if m is parse_method:
+                stats['mispredicted'] += 1
+            continue
+        finally:
+            durations[m.__name__] += time.perf_counter() - start
+        stats[m.__name__] += 1
+        if isinstance(d, dict):
+            return [to_fatality(d)]
+        if isinstance(d, list):
+            return [to_fatality(entry) for entry in d]
 
     raise ValueError(f'cannot parse {Fields.DECEASED}: "{deceased_field}"')
 
@@ -243,12 +325,10 @@ def parse_age_deceased_field(deceased_field):
     :return: a dictionary representing the deceased field.
     :rtype: dict
     """
-    age_pattern = re.compile(r'([0-9]+) years')
-
-    age = re.search(age_pattern, deceased_field)
+    age = AGE_PATTERN.search(deceased_field)
     if age is None:
         raise ValueError("age not found in Deceased field")
-    split_deceased_field = age_pattern.split(deceased_field)
+    split_deceased_field = AGE_PATTERN.split(deceased_field)
     d = parse_fleg(split_deceased_field[0].split())
     d[Fields.AGE] = int(age.group(1))
 
@@ -315,22 +395,7 @@ def parse_unidentified(deceased_field):
     :return: a list of dictionaries representing the deceased field.
     :rtype: list of dicts
     """
-    unidentified_deceased_pattern = re.compile(
-        r'''
-        (?:                         # Non captured group
-        (Unidentified               # The "Unidentified" keyword
-        |                           # Or
-        Unknown                     # The "Unknown" keyword
-        )
-        ,?                          # Potentially a comma
-        \s                          # A whitespace
-        (?P<ethinicty>[^\s]+\s)?    # The ethinicty
-        (?P<gender>female|male)     # The gender
-        )
-        ''',
-        re.VERBOSE,
-    )
-    matches = re.finditer(unidentified_deceased_pattern, deceased_field)
+    matches = UNIDENTIFIED_PATTERN.finditer(deceased_field)
     unidentified_fatalities = []
     for match in matches:
         d = {
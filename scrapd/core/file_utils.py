@@ -0,0 +1,19 @@
+"""Define a module to manipulate the files written by scrapd."""
+from pathlib import Path
+
+
+def atomic_write(path, data):
+    """
+    Write a text file, without ever leaving it partially written.
+
+    The data is written to a temporary file next to the target, which then replaces it. The parent directories are
+    created if needed.
+
+    :param str path: path of the file
+    :param str data: content of the file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_suffix('.tmp')
+    tmp_file.write_text(data)
+    tmp_file.replace(path)
@@ -4,12 +4,17 @@ Define the formatter module.
 This module contains all the classes with the ability to print the results. They destination depends on the custom
 formatter used to print the results and can be sdtout, sdterr, a file or even a remote storage if the formatter allows
 it.
+
+The results can be an iterator. In that case, the formatters able to do so print each result as soon as it is
+available.
 """
+from collections.abc import Iterator
 import csv
 import datetime
 import json
 import pprint
 import sys
+import textwrap
 
 from scrapd.core.constant import Fields
 from scrapd.core import model
@@ -64,6 +69,16 @@ def to_json(results):
     return json.dumps(results, sort_keys=True, indent=2, default=json_serializers)
 
 
+def materialize(results):
+    """
+    Collect the results of an iterator into a list.
+
+    :param results: the results to collect
+    :return: the results as a list if they were an iterator, the results unchanged otherwise.
+    """
+    return list(results) if isinstance(results, Iterator) else results
+
+
 class Formatter():
     """
     Define the Formatter base class.
@@ -106,7 +121,7 @@ class Formatter():
 
         :param list(dict) results: the results to display.
         """
-        print(results, file=self.output)
+        print(materialize(results), file=self.output)
 
 
 class PythonFormatter(Formatter):
@@ -120,35 +135,58 @@ class PythonFormatter(Formatter):
 
     def printer(self, results, **kwargs):  # noqa: D102
         pp = pprint.PrettyPrinter(indent=2, stream=self.output)
-        pp.pprint(results)
+        pp.pprint(materialize(results))
 
 
 class JSONFormatter(Formatter):
     """
     Define the JSON formatter.
 
-    Displays the results as JSON. The keys are sorted and an indentation of 2 spaces is set.
+    Displays the results as a JSON list. The keys are sorted and an indentation of 2 spaces is set. Each item of the
+    list is written as soon as it is available.
     """
 
     __format_name__ = 'json'
 
     def printer(self, results, **kwargs):  # noqa: D102
-        json_string = to_json(results)
-        print(json_string, file=self.output)
+        separator = '[\n'
+        for entry in results:
+            self.output.write(separator + textwrap.indent(to_json(entry), '  '))
+            self.output.flush()
+            separator = ',\n'
+        self.output.write('[]\n' if separator == '[\n' else '\n]\n')
+
+
+class NDJSONFormatter(Formatter):
+    """
+    Define the newline-delimited JSON formatter.
+
+    Displays each result as a compact JSON object with sorted keys, on its own line. Each line is written as soon as the
+    result is available, which allows to pipe the output into line-oriented tools.
+    """
+
+    __format_name__ = 'ndjson'
+
+    def printer(self, results, **kwargs):  # noqa: D102
+        for entry in results:
+            self.output.write(json.dumps(entry, sort_keys=True, default=json_serializers) + '\n')
+            self.output.flush()
 
 
 class CSVFormatter(Formatter):
     """
     Define the CSV formatter.
 
-    Displays the results as a CSV.
+    Displays the results as a CSV. The rows of each result are written as soon as it is available.
     """
 
     __format_name__ = 'csv'
 
     def printer(self, results, **kwargs):  # noqa: D102
-        rows = []
+        writer = csv.DictWriter(self.output, fieldnames=CSVFIELDS, extrasaction='ignore')
+        writer.writeheader()
         for entry in results:
+            rows = []
             for fatality in entry.fatalities:
                 rows.append({
                     Fields.CRASH: entry.crash,
@@ -167,9 +205,8 @@ class CSVFormatter(Formatter):
                     Fields.LINK: entry.link,
                     Fields.NOTES: entry.notes,
                 })
-        writer = csv.DictWriter(self.output, fieldnames=CSVFIELDS, extrasaction='ignore')
-        writer.writeheader()
-        writer.writerows(rows)
+            writer.writerows(rows)
+            self.output.flush()
 
 
 class CountFormatter(Formatter):
@@ -182,4 +219,4 @@ class CountFormatter(Formatter):
     __format_name__ = 'count'
 
     def printer(self, results, **kwargs):  # noqa: D102
-        print(len(results), file=self.output)
+        print(sum(1 for _ in results), file=self.output)
@@ -0,0 +1,137 @@
+"""
+Define the page index.
+
+The index keeps the range of publication dates covered by each news page, along with the first and last news it lists.
+New news are only ever added at the front of the news pages, which shifts the older news towards the following pages:
+the index detects the shift by locating the first or last news of the indexed pages on a fresh news page. It then
+guesses which news page lists the news published around a date, without bisecting the news pages.
+"""
+from collections import namedtuple
+import datetime
+import json
+from pathlib import Path
+
+from loguru import logger
+
+from scrapd.core.file_utils import atomic_write
+
+IndexEntry = namedtuple('IndexEntry', ['oldest', 'newest', 'first', 'last'])
+
+
+class PageIndex():
+    """Persist the range of publication dates covered by each news page."""
+
+    def __init__(self, path):
+        """
+        Initialize the index.
+
+        :param str path: path of the index file
+        """
+        self.path = Path(path)
+        self.pages = {}
+
+    def drift(self, page, publication_dates):
+        """
+        Compute the number of pages the news moved by since they were indexed.
+
+        :param int page: the news page number
+        :param list publication_dates: the (link, publication date) tuples of the news page
+        :return: the number of pages the news moved by, or 0 if the news page does not list any indexed news.
+        :rtype: int
+        """
+        links = {link for link, _ in publication_dates}
+        for indexed_page, entry in self.pages.items():
+            if entry.first in links:
+                return page - indexed_page
+
+        # The first news of an indexed page is on the previous page when the last one is on this page.
+        for indexed_page, entry in self.pages.items():
+            if entry.last in links:
+                return page - indexed_page - 1
+        return 0
+
+    def update(self, page, publication_dates):
+        """
+        Index a news page, shifting the indexed pages if the news moved since they were indexed.
+
+        The index is written to disk.
+
+        :param int page: the news page number
+        :param list publication_dates: the (link, publication date) tuples of the news page
+        :return: the number of pages the news moved by.
+        :rtype: int
+        """
+        if not publication_dates:
+            return 0
+
+        drift = self.drift(page, publication_dates)
+        if drift:
+            logger.debug(f'The news moved by {drift} page(s) since they were indexed.')
+            self.pages = {
+                indexed_page + drift: entry
+                for indexed_page, entry in self.pages.items() if indexed_page + drift > 0
+            }
+
+        dates = [date for _, date in publication_dates]
+        self.pages[page] = IndexEntry(min(dates), max(dates), publication_dates[0][0], publication_dates[-1][0])
+        self.save()
+        return drift
+
+    def guess(self, date, lag=datetime.timedelta(0)):
+        """
+        Guess the first news page listing a news published before a date.
+
+        :param datetime.date date: the date to compare the publication dates to
+        :param datetime.timedelta lag: delay added to the date, defaults to 0
+        :return: the first indexed page listing a news published on or before `date + lag`, the page following the
+            indexed ones if there is none, or `None` if the index is empty.
+        :rtype: int
+        """
+        if not self.pages:
+            return None
+        pages = sorted(page for page, entry in self.pages.items() if entry.oldest - lag <= date)
+        return pages[0] if pages else max(self.pages) + 1
+
+    def load(self):
+        """
+        Load the index from disk.
+
+        The index starts empty if its file is missing or invalid, and is rebuilt from the news pages read afterwards.
+        """
+        self.pages = {}
+        try:
+            data = json.loads(self.path.read_text())
+            for page, entry in data.get('pages', {}).items():
+                self.pages[int(page)] = IndexEntry(
+                    datetime.date.fromisoformat(entry['oldest']),
+                    datetime.date.fromisoformat(entry['newest']),
+                    entry['first'],
+                    entry['last'],
+                )
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError, AttributeError, KeyError) as e:
+            logger.warning(f'Ignoring invalid index file {self.path}: {e}')
+            self.pages = {}
+        logger.debug(f'{len(self.pages)} page(s) loaded from the index.')
+
+    def save(self):
+        """Write the date ranges of the indexed pages to disk."""
+        pages = {
+            page: {
+                'oldest': entry.oldest.isoformat(),
+                'newest': entry.newest.isoformat(),
+                'first': entry.first,
+                'last': entry.last,
+            }
+            for page, entry in self.pages.items()
+        }
+        atomic_write(self.path, json.dumps({'pages': pages}, sort_keys=True))
+
+    def purge(self):
+        """Remove the index from disk."""
+        self.pages = {}
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
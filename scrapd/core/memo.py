@@ -0,0 +1,102 @@
+"""
+Define the parse memo.
+
+The reports parsed from the detail pages are stored on disk, one JSON file per page, keyed by the SHA-256 digest of the
+page content. The entries are grouped by a digest of the source of the parser modules: a change to the parser never
+reads the entries stored by its previous revisions, since it may extract different reports from the same pages.
+"""
+from collections import namedtuple
+import hashlib
+import json
+from pathlib import Path
+import shutil
+
+from loguru import logger
+from pydantic import ValidationError
+
+from scrapd.core import constant
+from scrapd.core import model
+from scrapd.core.file_utils import atomic_write
+from scrapd.core.formatter import json_serializers
+
+MemoEntry = namedtuple('MemoEntry', ['report', 'short_circuited', 'errors'])
+
+# Modules whose source determines the reports parsed from a detail page.
+PARSER_MODULES = ('apd', 'article', 'constant', 'date_utils', 'deceased', 'model', 'regex', 'twitter')
+
+
+def parser_digest():
+    """
+    Compute the digest of the source of the parser modules.
+
+    :return: the first 16 hexadecimal digits of the SHA-256 digest.
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    for module in PARSER_MODULES:
+        digest.update((Path(__file__).parent / f'{module}.py').read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class ParseMemo():
+    """Store the reports parsed from the detail pages on disk."""
+
+    def __init__(self, directory=constant.MEMO_DIR, version=None):
+        """
+        Initialize the memo.
+
+        :param str directory: memo directory
+        :param str version: version of the parser, defaults to the digest of the parser modules
+        """
+        self.directory = Path(directory)
+        self.version = str(version or parser_digest())
+
+    def path(self, page, tiered=False):
+        """
+        Compute the path of the file storing the entry of a page.
+
+        :param str page: the content of the detail page
+        :param bool tiered: whether the page is parsed in tiered mode
+        :return: the path of the memo file.
+        :rtype: pathlib.Path
+        """
+        digest = hashlib.sha256(page.encode()).hexdigest()
+        mode = '-tiered' if tiered else ''
+        return self.directory / self.version / f'{digest}{mode}.json'
+
+    def get(self, page, tiered=False):
+        """
+        Retrieve the result of the parsing of a page.
+
+        :param str page: the content of the detail page
+        :param bool tiered: whether the page is parsed in tiered mode
+        :return: the report, whether its article extractors were all skipped and its parsing errors, or `None` if the
+            page was never parsed.
+        :rtype: MemoEntry
+        """
+        memo_file = self.path(page, tiered)
+        try:
+            entry = json.loads(memo_file.read_text())
+            return MemoEntry(model.Report(**entry['report']), entry['short_circuited'], entry['errors'])
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError, KeyError, ValidationError) as e:
+            logger.debug(f'Ignoring corrupted memo entry {memo_file}: {e}')
+            return None
+
+    def set(self, page, report, short_circuited=False, errors=None, tiered=False):
+        """
+        Store the result of the parsing of a page.
+
+        :param str page: the content of the detail page
+        :param model.Report report: the report parsed from the page
+        :param bool short_circuited: whether the article extractors were all skipped
+        :param list errors: the parsing errors, defaults to None
+        :param bool tiered: whether the page was parsed in tiered mode
+        """
+        entry = {'report': report, 'short_circuited': short_circuited, 'errors': list(errors or [])}
+        atomic_write(self.path(page, tiered), json.dumps(entry, sort_keys=True, default=json_serializers))
+
+    def purge(self):
+        """Remove all the entries, of all the versions."""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -1,8 +1,134 @@
-"""Functions with regex patterns for parsing APD crash bulletins."""
+"""
+Functions with regex patterns for parsing APD crash bulletins.
+
+The patterns are compiled once, when the module is loaded. The :func:`scan` function extracts several fields at once,
+and the `match_*` functions extract a single field.
+"""
 
 import re
 
-from dateparser.search import search_dates
+from scrapd.core import date_utils
+from scrapd.core.constant import Fields
+
+CASE_PATTERN = re.compile(
+    r'''
+    Case:           # The name of the field we are looking for.
+    .*              # Any character.
+    (\d{2}-\d{6,7}) # The case the number we are looking for.
+    ''',
+    re.VERBOSE,
+)
+
+CRASH_PATTERN = re.compile(
+    r'''
+    (?:
+    (?:Traffic\sFatality\s\#(\d{1,3}))
+    |
+    (?:Fatality\sCrash\s\#(\d{1,3}))
+    )
+    ''',
+    re.VERBOSE,
+)
+
+DATE_PATTERN = re.compile(
+    r'''
+    >Date:          # The name of the desired field.
+    \s*             # # Any whitespace
+    (?:</span>)?    # Non capture closing span tag
+    (?:</strong>)?  # Non-capture (literal match).
+    ([^<]*)         # Capture any character except '<'.
+    <               # Non-capture (literal match)
+    ''',
+    re.VERBOSE,
+)
+
+LOCATION_PATTERN = re.compile(
+    r'''
+    >Location:      # The name of the desired field.
+    \s*             # Any whitespace
+    (?:</span>)?    # Non capture closing span tag
+    (?:</strong>)?  # Non capture closing strong tag
+    \s{2,}          # Any whitespace (at least 2)
+    (?:</strong>)?  # Non capture closing strong tag
+    ([^<]+)         # Capture any character except '<'.
+    ''',
+    re.VERBOSE,
+)
+
+TIME_PATTERN = re.compile(
+    r'''
+    Time:                             # The name of the desired field.
+    (?:</strong>)?                    # Non capture closing strong tag
+    \D*?                              # Any non-digit character (lazy).
+    (
+    (?:0?[1-9]|1[0-2]):?[0-5]?\d?     # 12h format.
+    \s*                               # Any whitespace (zero-unlimited).
+    [AaPp]\.?[Mm]\.?                  # AM/PM variations.
+    |                                 # OR
+    (?:[01]?[0-9]|2[0-3]):[0-5][0-9]  # 24h format.
+    )
+    ''',
+    re.VERBOSE,
+)
+
+TWITTER_DESCRIPTION_PATTERN = re.compile(
+    r'''
+    <meta
+    \s+
+    name=\"twitter:description\"
+    \s+
+    content=\"(.*)\"
+    \s+
+    />
+    ''',
+    re.VERBOSE,
+)
+
+TWITTER_TITLE_PATTERN = re.compile(
+    r'''
+    <meta
+    \s+
+    name=\"twitter:title\"
+    \s+
+    content=\"(.*)\"
+    \s+
+    />
+    ''',
+    re.VERBOSE,
+)
+
+TWITTER_DESCRIPTION = 'twitter_description'
+TWITTER_TITLE = 'twitter_title'
+
+# Patterns of the fields extracted by `scan()`. Each pattern starts with a literal, which lets the regex engine jump
+# straight to its candidate positions: a single alternation of all the patterns would be much slower to search.
+FIELD_PATTERNS = {
+    Fields.CASE: CASE_PATTERN,
+    Fields.CRASH: CRASH_PATTERN,
+    Fields.DATE: DATE_PATTERN,
+    Fields.LOCATION: LOCATION_PATTERN,
+    Fields.TIME: TIME_PATTERN,
+    TWITTER_DESCRIPTION: TWITTER_DESCRIPTION_PATTERN,
+    TWITTER_TITLE: TWITTER_TITLE_PATTERN,
+}
+
+
+def scan(page, fields=None):
+    """
+    Extract several fields from the content of the fatality page at once.
+
+    The captures are identical to the ones of the `match_*` functions: the first match of each field is kept.
+
+    :param str page: the content of the fatality page
+    :param tuple fields: the fields to extract, defaults to all the fields of `FIELD_PATTERNS`
+    :return: a dict mapping each field to its captured string, or to an empty string if the field was not found.
+    :rtype: dict
+    """
+    captures = {}
+    for field in fields or FIELD_PATTERNS:
+        match = FIELD_PATTERNS[field].search(page)
+        captures[field] = next((group for group in match.groups() if group), '') if match else ''
+    return captures
 
 
 def match_location_field(page):
@@ -12,19 +138,7 @@ def match_location_field(page):
     :param page: the content of the fatality page
     :type page: str
     """
-    location_pattern = re.compile(
-        r'''
-        >Location:      # The name of the desired field.
-        \s*             # Any whitespace
-        (?:</span>)?    # Non capture closing span tag
-        (?:</strong>)?  # Non capture closing strong tag
-        \s{2,}          # Any whitespace (at least 2)
-        (?:</strong>)?  # Non capture closing strong tag
-        ([^<]+)         # Capture any character except '<'.
-        ''',
-        re.VERBOSE,
-    )
-    return match_pattern(page, location_pattern)
+    return match_pattern(page, LOCATION_PATTERN)
 
 
 def match_pattern(text, pattern, group_number=0):
@@ -49,22 +163,7 @@ def match_time_field(page):
     :return: a string representing the time.
     :rtype: str
     """
-    time_pattern = re.compile(
-        r'''
-        Time:                             # The name of the desired field.
-        (?:</strong>)?                    # Non capture closing strong tag
-        \D*?                              # Any non-digit character (lazy).
-        (
-        (?:0?[1-9]|1[0-2]):?[0-5]?\d?     # 12h format.
-        \s*                               # Any whitespace (zero-unlimited).
-        [AaPp]\.?[Mm]\.?                  # AM/PM variations.
-        |                                 # OR
-        (?:[01]?[0-9]|2[0-3]):[0-5][0-9]  # 24h format.
-        )
-        ''',
-        re.VERBOSE,
-    )
-    return match_pattern(page, time_pattern)
+    return match_pattern(page, TIME_PATTERN)
 
 
 def match_case_field(page):
@@ -75,15 +174,7 @@ def match_case_field(page):
     :return: a string representing the case number.
     :rtype: str
     """
-    case_pattern = re.compile(
-        r'''
-        Case:           # The name of the field we are looking for.
-        .*              # Any character.
-        (\d{2}-\d{6,7}) # The case the number we are looking for.
-        ''',
-        re.VERBOSE,
-    )
-    return match_pattern(page, case_pattern)
+    return match_pattern(page, CASE_PATTERN)
 
 
 def match_crash_field(page):
@@ -94,17 +185,7 @@ def match_crash_field(page):
     :return: a string representing the crash number.
     :rtype: str
     """
-    crashes_pattern = re.compile(
-        r'''
-        (?:
-        (?:Traffic\sFatality\s\#(\d{1,3}))
-        |
-        (?:Fatality\sCrash\s\#(\d{1,3}))
-        )
-        ''',
-        re.VERBOSE,
-    )
-    matches = crashes_pattern.search(page)
+    matches = CRASH_PATTERN.search(page)
     if not matches:
         return None
 
@@ -120,17 +201,15 @@ def match_date_field(page):
     :return: a string representing the date.
     :rtype: str
     """
-    date_pattern = re.compile(
-        r'''
-        >Date:          # The name of the desired field.
-        \s*             # # Any whitespace
-        (?:</span>)?    # Non capture closing span tag
-        (?:</strong>)?  # Non-capture (literal match).
-        ([^<]*)         # Capture any character except '<'.
-        <               # Non-capture (literal match)
-        ''',
-        re.VERBOSE,
-    )
-    date = match_pattern(page, date_pattern).replace('.', ' ')
-    date = search_dates(date)
-    return date[0][1].date() if date else None
+    return parse_date_field(match_pattern(page, DATE_PATTERN))
+
+
+def parse_date_field(date_field):
+    """
+    Convert the captured date field to a date.
+
+    :param str date_field: the captured date field
+    :return: the date or `None` if the field does not contain a date.
+    :rtype: datetime.date
+    """
+    return date_utils.search_date(date_field.replace('.', ' '))
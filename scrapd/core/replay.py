@@ -0,0 +1,110 @@
+"""
+Define the replay backend.
+
+The replay session mimics an `aiohttp.ClientSession` but reads the pages from a local archive instead of the network.
+The archive is either a page archive file (see :mod:`scrapd.core.archive`), or a directory using the same layout as the
+`tests/data` directory:
+
+* the news pages are named after the last part of their URL, followed by their page parameter if any (`296`,
+  `296-page=1`, etc.),
+* the detail pages are named after the last part of their URL (`traffic-fatality-2-3`, etc.).
+"""
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+from scrapd.core.archive import PageArchive
+from scrapd.core.cache import ResponseCache
+
+
+def archive_name(url, params=None):
+    """
+    Compute the name of the archived file of a page.
+
+    :param str url: page URL
+    :param dict params: request parameters, defaults to None
+    :return: the name of the archived file.
+    :rtype: str
+    """
+    name = urlsplit(url).path.rstrip('/').split('/')[-1]
+    if params and 'page' in params:
+        name = f'{name}-page={params["page"]}'
+    return name
+
+
+class ReplayResponse():
+    """Represent a response read from the archive."""
+
+    def __init__(self, url, status, body, headers=None):
+        """
+        Initialize the response.
+
+        :param str url: request URL
+        :param int status: HTTP status code
+        :param str body: response body
+        :param dict headers: response headers, defaults to None
+        """
+        self.url = url
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+
+    async def __aenter__(self):  # noqa: D105
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):  # noqa: D105
+        pass
+
+    async def text(self):
+        """Return the response body."""
+        return self.body
+
+
+class ReplaySession():
+    """Replay the pages of an archive."""
+
+    def __init__(self, path):
+        """
+        Initialize the session.
+
+        :param str path: archive directory or page archive file
+        """
+        self.path = Path(path)
+        self.archive = PageArchive(self.path) if self.path.is_file() else None
+
+    async def __aenter__(self):  # noqa: D105
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):  # noqa: D105
+        await self.close()
+
+    async def close(self):
+        """Close the session."""
+
+    # pylint: disable=unused-argument
+    def get(self, url, params=None, headers=None, **kwargs):
+        """
+        Read a page from the archive.
+
+        Pages missing from the archive get a 404 response with an empty body.
+
+        :param str url: request URL
+        :param dict params: request parameters, defaults to None
+        :param dict headers: request headers, ignored
+        :return: the archived response.
+        :rtype: ReplayResponse
+        """
+        if self.archive:
+            archived_page = self.archive.read(ResponseCache.cache_url(url, params))
+            if archived_page:
+                return ReplayResponse(url, archived_page.status, archived_page.body, archived_page.headers)
+            logger.warning(f'{url} is missing from the archive {self.path}.')
+            return ReplayResponse(url, 404, '')
+
+        archived_file = self.path / archive_name(url, params)
+        try:
+            return ReplayResponse(url, 200, archived_file.read_text())
+        except FileNotFoundError:
+            logger.warning(f'{url} is missing from the archive: {archived_file} not found.')
+            return ReplayResponse(url, 404, '')
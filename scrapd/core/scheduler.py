@@ -0,0 +1,384 @@
+"""
+Define the request scheduler.
+
+The scheduler sits between the crawler and the HTTP requests. It caps the number of requests in flight, optionally
+adapting the cap to the health of the server, smooths the request rate of each host with a token bucket, and honors the
+`Retry-After` header of the throttled responses. It also coalesces the concurrent requests for the same URL into a
+single one, and can hedge the slowest requests: a request taking longer than most of the recent ones is sent a second
+time, and the first response is kept.
+"""
+import asyncio
+from collections import Counter
+from collections import deque
+from contextlib import asynccontextmanager
+import datetime
+from email.utils import parsedate_to_datetime
+import math
+import time
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+from scrapd.core import constant
+
+
+class TokenBucket():
+    """Limit a request rate using the token bucket algorithm."""
+
+    def __init__(self, rate, capacity=None):
+        """
+        Initialize the bucket.
+
+        :param float rate: number of tokens added per second
+        :param float capacity: maximum number of tokens, defaults to `max(1, rate)`
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def reserve(self):
+        """
+        Reserve a token.
+
+        The tokens can be borrowed in advance, in which case the caller must wait for the bucket to refill.
+
+        :return: the time to wait before using the token (second).
+        :rtype: float
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(delay, self.paused_until - now)
+
+    async def acquire(self):
+        """Wait until a token is available."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, delay):
+        """
+        Stop delivering tokens for a while.
+
+        :param float delay: pause duration (second)
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+
+class ConcurrencyLimit():
+    """
+    Cap the number of requests in flight.
+
+    An adaptive limit follows the additive increase, multiplicative decrease (AIMD) algorithm: the window grows by one
+    request per window of healthy responses, and is cut on errors. A response is healthy if its latency stays close to
+    the lowest recent one.
+    """
+
+    def __init__(self, maximum, adaptive=False):
+        """
+        Initialize the limit.
+
+        :param int maximum: maximum number of requests in flight, 0 for unlimited
+        :param bool adaptive: adapt the number of requests in flight up to the maximum, defaults to False
+        """
+        self.maximum = maximum or math.inf
+        self.adaptive = adaptive
+        self.window = min(constant.AIMD_INITIAL, self.maximum) if adaptive else self.maximum
+        self.active = 0
+        self.waiters = deque()
+        self.latencies = deque(maxlen=constant.LATENCY_WINDOW)
+        self.outcomes = 0
+        self.decreases = 0
+
+    @property
+    def limit(self):
+        """Return the current number of requests allowed in flight."""
+        return max(1, int(self.window)) if self.window < math.inf else self.window
+
+    async def acquire(self):
+        """Wait until a request can be sent."""
+        while self.active >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass the wake-up on to another request if this one was already woken up.
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+                else:
+                    self.wake()
+                raise
+        self.active += 1
+
+    def release(self):
+        """Signal that a request completed."""
+        self.active -= 1
+        self.wake()
+
+    def wake(self):
+        """Wake the waiting requests which can be sent."""
+        available = self.limit - self.active
+        while self.waiters and available > 0:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                available -= 1
+
+    def success(self, latency):
+        """
+        Account for a successful response, and widen the window if the latency is healthy.
+
+        :param float latency: latency of the response (second)
+        """
+        self.latencies.append(latency)
+        self.outcomes += 1
+        if not self.adaptive or latency > min(self.latencies) * constant.AIMD_LATENCY_TOLERANCE:
+            return
+        limit = self.limit
+        self.window = min(self.window + 1 / self.window, self.maximum)
+        if self.limit > limit:
+            logger.debug(f'Concurrency window widened to {self.limit}.')
+            self.wake()
+
+    def failure(self):
+        """
+        Account for a failed request, and narrow the window.
+
+        The window is narrowed at most once per window of responses, since the requests which were already in flight
+        are likely to fail for the same reason.
+        """
+        if not self.adaptive or self.outcomes < self.limit:
+            self.outcomes += 1
+            return
+        self.outcomes = 0
+        self.decreases += 1
+        self.window = max(1, self.window * constant.AIMD_DECREASE)
+        logger.debug(f'Concurrency window narrowed to {self.limit}.')
+
+
+def parse_retry_after(value, default=constant.RETRY_AFTER):
+    """
+    Parse the value of a `Retry-After` header.
+
+    :param str value: number of seconds or HTTP date
+    :param float default: value to use if the header is missing or invalid
+    :return: the delay to wait (second).
+    :rtype: float
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0.0, (retry_date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class Scheduler():
+    """Schedule the HTTP requests."""
+
+    def __init__(
+            self,
+            max_in_flight=constant.MAX_IN_FLIGHT,
+            rate=constant.RATE,
+            max_throttled=constant.MAX_THROTTLED,
+            hedge=False,
+            adaptive=False,
+    ):
+        """
+        Initialize the scheduler.
+
+        :param int max_in_flight: maximum number of concurrent requests, 0 for unlimited
+        :param float rate: maximum number of requests per second and per host, 0 for unlimited
+        :param int max_throttled: maximum number of retries of a throttled request
+        :param bool hedge: send the slowest requests a second time, defaults to False
+        :param bool adaptive: adapt the number of requests in flight up to `max_in_flight`, defaults to False
+        """
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.max_throttled = max_throttled
+        self.hedge = hedge
+        self.buckets = {}
+        self.throttled = 0
+        self.hedged = 0
+        self.latencies = deque(maxlen=constant.LATENCY_WINDOW)
+        self.coalesced = 0
+        self.in_flight = {}
+        self.waiters = Counter()
+        self.concurrency = ConcurrencyLimit(max_in_flight, adaptive)
+
+    def bucket(self, url):
+        """
+        Get the token bucket of the host of a URL.
+
+        :param str url: request URL
+        :return: the token bucket of the host.
+        :rtype: TokenBucket
+        """
+        host = urlsplit(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate)
+        return self.buckets[host]
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """
+        Wait for the permission to send a request.
+
+        :param str url: request URL
+        """
+        await self.concurrency.acquire()
+        try:
+            if self.rate > 0:
+                await self.bucket(url).acquire()
+            yield
+        finally:
+            self.concurrency.release()
+
+    async def submit(self, url, request):
+        """
+        Send a request when allowed to.
+
+        Throttled responses (429 or 503) pause the requests to the host for the time specified by their `Retry-After`
+        header, then the request is sent again.
+
+        :param str url: request URL
+        :param request: a coroutine function sending the request and returning an object with `status` and `headers`
+            attributes
+        :return: the response returned by `request`.
+        """
+        for attempt in range(self.max_throttled + 1):
+            response = await self.send(url, request)
+            if response.status not in constant.THROTTLED_STATUSES or attempt >= self.max_throttled:
+                return response
+
+            # Pause the host.
+            self.throttled += 1
+            delay = parse_retry_after(response.headers.get('Retry-After'))
+            logger.debug(f'{url} throttled with status {response.status}: retrying in {delay:.1f}s.')
+            if self.rate > 0:
+                self.bucket(url).pause(delay)
+            else:
+                await asyncio.sleep(delay)
+        return response  # pragma: no cover
+
+    def hedge_delay(self):
+        """
+        Compute the time after which a request is hedged.
+
+        :return: the percentile `constant.HEDGE_PERCENTILE` of the recent latencies (second), or `None` if the requests
+            are not hedged or if too few latencies were observed.
+        :rtype: float
+        """
+        if not self.hedge or len(self.latencies) < constant.HEDGE_MIN_SAMPLES:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, len(latencies) * constant.HEDGE_PERCENTILE // 100)]
+
+    async def timed(self, url, request, sent=None):
+        """
+        Send a request when allowed to, and record its latency and its outcome.
+
+        The recorded latency excludes the time spent waiting for the permission to send the request.
+
+        :param str url: request URL
+        :param request: a coroutine function sending the request
+        :param asyncio.Event sent: event set once the request is allowed to be sent, defaults to None
+        :return: the value returned by `request`.
+        """
+        async with self.slot(url):
+            if sent:
+                sent.set()
+            start = time.monotonic()
+            try:
+                response = await request()
+            except asyncio.CancelledError:
+                # A cancelled request says nothing about the health of the server (and is an `Exception` on py3.7).
+                raise
+            except Exception:
+                self.concurrency.failure()
+                raise
+        latency = time.monotonic() - start
+        self.latencies.append(latency)
+
+        if response.status in constant.THROTTLED_STATUSES or response.status in constant.ERROR_STATUSES:
+            self.concurrency.failure()
+        else:
+            self.concurrency.success(latency)
+        return response
+
+    async def send(self, url, request):
+        """
+        Send a request when allowed to, hedging it if it is slower than most of the recent ones.
+
+        A request is only hedged after it was sent, once it took longer than the percentile `constant.HEDGE_PERCENTILE`
+        of the recent latencies.
+
+        :param str url: request URL
+        :param request: a coroutine function sending the request
+        :return: the first successful value returned by `request`.
+        """
+        sent = asyncio.Event()
+        tasks = [asyncio.ensure_future(self.timed(url, request, sent))]
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                # The hedge delay starts once the request is sent: a request waiting for a slot is never hedged.
+                waiter = asyncio.ensure_future(sent.wait())
+                try:
+                    await asyncio.wait([tasks[0], waiter], return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    waiter.cancel()
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedged += 1
+                logger.debug(f'{url} (hedged)')
+                tasks.append(asyncio.ensure_future(self.timed(url, request)))
+
+            # Keep the first successful response, or raise the error of the first request.
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                successful = [task for task in done if not task.exception()]
+                if successful:
+                    return successful[0].result()
+            return tasks[0].result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def coalesce(self, key, request):
+        """
+        Send a request, unless an identical one is already in flight.
+
+        The concurrent requests with the same key share the result of the first one. The shared request is only
+        cancelled once all its callers are cancelled.
+
+        :param str key: key identifying the request, for instance its normalized URL
+        :param request: a coroutine function sending the request
+        :return: the value returned by `request`.
+        """
+        if key in self.in_flight:
+            self.coalesced += 1
+            logger.debug(f'{key} (coalesced)')
+        else:
+            self.in_flight[key] = asyncio.ensure_future(request())
+        task = self.in_flight[key]
+        self.waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self.waiters[key] -= 1
+            if not self.waiters[key]:
+                del self.waiters[key]
+                del self.in_flight[key]
+                task.cancel()
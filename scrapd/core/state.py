@@ -0,0 +1,84 @@
+"""
+Define the crawl state.
+
+The state keeps the reports collected during the previous runs, indexed by the link of their detail page. It allows
+incremental crawls, which only fetch the detail pages that were never seen before.
+"""
+import json
+from pathlib import Path
+
+from loguru import logger
+from pydantic import ValidationError
+
+from scrapd.core import date_utils
+from scrapd.core import model
+from scrapd.core.file_utils import atomic_write
+from scrapd.core.formatter import json_serializers
+
+
+class CrawlState():
+    """Persist the reports collected by the previous runs."""
+
+    def __init__(self, path):
+        """
+        Initialize the state.
+
+        :param str path: path of the state file
+        """
+        self.path = Path(path)
+        self.reports = {}
+
+    def __contains__(self, link):
+        """Return `True` if the detail page was already parsed."""
+        return link in self.reports
+
+    def get(self, link):
+        """
+        Get the report parsed from a detail page.
+
+        :param str link: detail page URL
+        :return: the report or `None` if the link is unknown.
+        :rtype: model.Report
+        """
+        return self.reports.get(link)
+
+    def add(self, report):
+        """
+        Add a report to the state.
+
+        :param model.Report report: the report to add
+        """
+        self.reports[report.link] = report
+
+    def between(self, from_=None, to=None):
+        """
+        Get the reports within a time range.
+
+        :param datetime.date from_: start date, defaults to None
+        :param datetime.date to: end date, defaults to None
+        :return: the reports within the time range.
+        :rtype: list
+        """
+        return [report for report in self.reports.values() if date_utils.is_between(report.date, from_, to)]
+
+    def load(self):
+        """
+        Load the state from disk.
+
+        A missing or invalid state file results in an empty state.
+        """
+        self.reports = {}
+        try:
+            data = json.loads(self.path.read_text())
+            for link, report in data.get('reports', {}).items():
+                self.reports[link] = model.Report(**report)
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError, AttributeError, ValidationError) as e:
+            logger.warning(f'Ignoring invalid state file {self.path}: {e}')
+            self.reports = {}
+        logger.debug(f'{len(self.reports)} report(s) loaded from the state.')
+
+    def save(self):
+        """Write the state to disk."""
+        atomic_write(self.path, json.dumps({'reports': self.reports}, sort_keys=True, default=json_serializers))
@@ -18,19 +18,7 @@ def match_title_meta(page):
     :return: a string representing the twitter tittle.
     :rtype: str
     """
-    pattern = re.compile(
-        r'''
-        <meta
-        \s+
-        name=\"twitter:title\"
-        \s+
-        content=\"(.*)\"
-        \s+
-        />
-        ''',
-        re.VERBOSE,
-    )
-    return regex.match_pattern(page, pattern)
+    return regex.match_pattern(page, regex.TWITTER_TITLE_PATTERN)
 
 
 def match_description_meta(page):
@@ -41,19 +29,7 @@ def match_description_meta(page):
     :return: a string representing the twitter description.
     :rtype: str
     """
-    pattern = re.compile(
-        r'''
-        <meta
-        \s+
-        name=\"twitter:description\"
-        \s+
-        content=\"(.*)\"
-        \s+
-        />
-        ''',
-        re.VERBOSE,
-    )
-    return regex.match_pattern(page, pattern)
+    return regex.match_pattern(page, regex.TWITTER_DESCRIPTION_PATTERN)
 
 
 def tokenize_description(twitter_description):
@@ -207,8 +183,9 @@ def parse_title(twitter_title):
 
 def parse(page):
     """Parse the twitter metadata."""
-    twitter_title = match_title_meta(page)
-    twitter_description = match_description_meta(page)
+    fields = regex.scan(page, (regex.TWITTER_TITLE, regex.TWITTER_DESCRIPTION))
+    twitter_title = fields[regex.TWITTER_TITLE]
+    twitter_description = fields[regex.TWITTER_DESCRIPTION]
 
     # Parse the twitter description.
     report, err = parse_description(twitter_description)
@@ -61,6 +61,65 @@ def flame_graph(c):
     c.run(f'sudo {pyspy.resolve()} -d 20 --flame profile.svg -- {(venv_bin /project_name ).resolve()} -v --pages 5')
 
 
+@task
+def benchmark_parser(c, number=5):
+    """Compare the HTML parser engines on the test pages."""
+    import timeit
+
+    from scrapd.core import article
+
+    pages = load_test_pages()
+    reports = {}
+    for engine in article.HTML_ENGINES:
+        if not article.bs4.builder.builder_registry.lookup(engine):
+            print(f'{engine}: not installed')
+            continue
+        article.HTML_ENGINE = engine
+        reports[engine] = [str(result) for result in parse_pages(pages)]
+        duration = timeit.timeit(lambda: parse_pages(pages), number=number)
+        print(f'{engine}: {duration / number / len(pages) * 1000:.2f} ms per page')
+    article.HTML_ENGINE = article.detect_html_engine()
+    if len(set(map(tuple, reports.values()))) > 1:
+        print('The engines produce different reports.')
+
+
+@task
+def benchmark_dates(c, number=5):
+    """Measure the date parsing of the test pages and report the fast path hit ratio."""
+    import timeit
+
+    from scrapd.core import date_utils
+
+    caches = (date_utils.cached_parse_date, date_utils.cached_parse_time, date_utils.cached_search_date)
+
+    def parse_all(pages):
+        for cache in caches:
+            cache.cache_clear()
+        return parse_pages(pages)
+
+    pages = load_test_pages()
+    parse_all(pages)
+    date_utils.stats.clear()
+    duration = timeit.timeit(lambda: parse_all(pages), number=number)
+    print(f'{duration / number / len(pages) * 1000:.2f} ms per page')
+    fast, fallback = date_utils.stats['fast'], date_utils.stats['fallback']
+    print(f'fast path: {fast} of {fast + fallback} strings ({fast / max(fast + fallback, 1):.0%})')
+
+
+@task
+def benchmark_deceased(c):
+    """Report the parse method hits and durations of the deceased fields of the test pages."""
+    from scrapd.core import article
+    from scrapd.core import deceased
+
+    for page in load_test_pages():
+        article.parse_deceased_field(article.to_soup(page))
+    for name, hits in deceased.stats.most_common():
+        duration = f', {deceased.durations[name] * 1000:.2f} ms' if name in deceased.durations else ''
+        print(f'{name}: {hits}{duration}')
+    print(f'classify: {deceased.durations["classify"] * 1000:.2f} ms')
+
+
 @task
 def nox(c, s=''):
     """Wrapper for the nox tasks (`inv nox list` for details)."""
@@ -105,3 +164,32 @@ def get_venv(venv):
     venv_bin = Path(venv.bin)
     activate = venv_bin / 'activate'
     return venv, venv_bin, activate
+
+
+def load_test_pages():
+    """
+    Load the fatality detail pages of the test data.
+
+    :return: the content of the pages.
+    :rtype: list
+    """
+    return [page.read_text() for page in sorted(Path('tests/data').glob('traffic-fatality-*'))]
+
+
+def parse_pages(pages):
+    """
+    Parse fatality detail pages.
+
+    :param list pages: the content of the pages
+    :return: the parsed report and parsing errors of each page, or the error raised while parsing it.
+    :rtype: list
+    """
+    from scrapd.core import article
+
+    results = []
+    for page in pages:
+        try:
+            results.append(article.parse_content(page))
+        except ValueError as e:
+            results.append(e)
+    return results
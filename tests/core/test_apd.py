@@ -1,4 +1,6 @@
 """Test the APD module."""
+from concurrent.futures import ProcessPoolExecutor
+import datetime
 from unittest import mock
 
 import aiohttp
@@ -12,7 +14,10 @@ from tenacity import stop_after_attempt
 
 from scrapd.core import apd
 from scrapd.core import article
+from scrapd.core import constant
 from scrapd.core import twitter
+from scrapd.core.cache import ResponseCache
+from scrapd.core.memo import ParseMemo
 from tests.test_common import load_dumped_page
 from tests.test_common import load_test_page
 from tests.test_common import TEST_DATA_DIR
@@ -59,6 +64,47 @@ def test_extract_traffic_fatalities_page_details_link_01():
     assert actual == expected
 
 
+def test_extract_publication_dates_00(news_page):
+    """Ensure the publication dates are extracted from the news page."""
+    actual = apd.extract_publication_dates(news_page)
+    assert len(actual) == 20
+    assert actual[0] == ('/news/traffic-fatality-2-3', datetime.date(2019, 1, 18))
+    assert actual[-1] == ('/news/traffic-fatality-69-3', datetime.date(2018, 12, 5))
+
+
+def test_client_timeout_00():
+    """Ensure the deadlines of the requests are set, 0 meaning no deadline."""
+    timeout = apd.client_timeout(5, 0)
+    assert timeout.sock_connect == 5
+    assert timeout.sock_read is None
+    assert timeout.total is None
+
+
+@pytest.mark.asyncio
+async def test_create_session_00():
+    """Ensure the session keeps the connections alive and caches the DNS lookups."""
+    with mock.patch('aiohttp.ClientSession', wraps=aiohttp.ClientSession) as client_session:
+        session = apd.create_session()
+    try:
+        kwargs = client_session.call_args[1]
+        assert session.connector.limit_per_host == constant.LIMIT_PER_HOST
+        assert session.connector.use_dns_cache
+        assert kwargs['headers'] == {'Accept-Encoding': 'gzip, deflate'}
+        assert kwargs['timeout'].sock_read == constant.READ_TIMEOUT
+    finally:
+        await session.close()
+
+
+def test_count_news_pages_00(news_page):
+    """Ensure the number of news pages is read from the pager."""
+    assert apd.count_news_pages(news_page) == 28
+
+
+def test_count_news_pages_01():
+    """Ensure the number of news pages is 0 without pager."""
+    assert apd.count_news_pages('') == 0
+
+
 def test_generate_detail_page_urls_00():
     """Ensure a full URL is generated from a partial one."""
     actual = apd.generate_detail_page_urls([
@@ -93,55 +139,6 @@ def test_has_next_02(input_, expected):
     assert apd.has_next(input_) == expected
 
 
-@asynctest.patch("scrapd.core.apd.fetch_news_page",
-                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
-@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-2-3'))
-@pytest.mark.asyncio
-async def test_date_filtering_00(fake_details, fake_news):
-    """Ensure the date filtering do not fetch unnecessary data."""
-    expected = 2
-    data, actual = await apd.async_retrieve(pages=-1, from_="2050-01-02", to="2050-01-03")
-    assert actual == expected
-    assert isinstance(data, list)
-
-
-@asynctest.patch("scrapd.core.apd.fetch_news_page",
-                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
-@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-2-3'))
-@pytest.mark.asyncio
-async def test_date_filtering_01(fake_details, fake_news):
-    """Ensure the date filtering do not fetch unnecessary data."""
-    data, _ = await apd.async_retrieve(pages=-5, from_="2019-01-02", to="2019-01-03")
-    assert isinstance(data, list)
-
-
-@asynctest.patch("scrapd.core.apd.fetch_news_page",
-                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
-@asynctest.patch(
-    "scrapd.core.apd.fetch_detail_page",
-    side_effect=[load_test_page(page) for page in ['traffic-fatality-2-3'] + ['traffic-fatality-71-2'] * 14])
-@pytest.mark.asyncio
-async def test_date_filtering_02(fake_details, fake_news):
-    """Ensure the date filtering do not fetch unnecessary data."""
-    data, page_count = await apd.async_retrieve(from_="2019-01-16", to="2019-01-16")
-    assert isinstance(data, list)
-    assert len(data) == 1
-    assert page_count == 2
-
-
-@asynctest.patch("scrapd.core.apd.fetch_news_page",
-                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
-@asynctest.patch("scrapd.core.apd.fetch_detail_page", side_effect=[load_test_page('traffic-fatality-50-3')] * 15)
-@pytest.mark.asyncio
-async def test_both_fatalities_from_one_incident(fake_details, fake_news):
-    data, _ = await apd.async_retrieve(pages=-1, from_="2019-08-16", to="2019-08-18", attempts=1, backoff=1)
-    assert isinstance(data, list)
-    assert len(data) == 1
-    assert len(data[0].fatalities) == 2
-    assert data[0].fatalities[0].age == 36
-    assert data[0].fatalities[1].age == 27
-
-
 @pytest.mark.asyncio
 async def test_fetch_text_00():
     """Ensure `fetch_text` retries several times."""
@@ -167,12 +164,46 @@ async def test_fetch_text_01():
             assert '{"foo": "bar"}' == text
 
 
-@asynctest.patch("scrapd.core.apd.fetch_news_page", side_effect=ValueError)
 @pytest.mark.asyncio
-async def test_async_retrieve_00(fake_news):
-    """Ensure `async_retrieve` raises `ValueError` when `fetch_news_page` fails to retrieve data."""
-    with pytest.raises(ValueError):
-        await apd.async_retrieve()
+async def test_fetch_text_02(tmp_path):
+    """Ensure fetch_text serves fresh responses from the cache."""
+    url = fake.uri()
+    cache = ResponseCache(tmp_path)
+    cache.set(url, {}, 'cached')
+    with aioresponses():
+        async with aiohttp.ClientSession() as session:
+            text = await apd.fetch_text(session, url, cache=cache, ttl=60)
+    assert text == 'cached'
+
+
+@pytest.mark.asyncio
+async def test_fetch_text_03(tmp_path):
+    """Ensure fetch_text revalidates stale responses."""
+    url = fake.uri()
+    cache = ResponseCache(tmp_path)
+    cache.set(url, {}, 'cached', {'ETag': '"abc"'})
+    with aioresponses() as m:
+        m.get(url, status=304)
+        async with aiohttp.ClientSession() as session:
+            text = await apd.fetch_text(session, url, cache=cache, ttl=0)
+        request = list(m.requests.values())[0][0]
+    assert text == 'cached'
+    assert request.kwargs['headers'] == {'If-None-Match': '"abc"'}
+
+
+@pytest.mark.asyncio
+async def test_fetch_text_04(tmp_path):
+    """Ensure fetch_text stores the responses in the cache."""
+    url = fake.uri()
+    cache = ResponseCache(tmp_path)
+    with aioresponses() as m:
+        m.get(url, body='fetched', headers={'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        async with aiohttp.ClientSession() as session:
+            text = await apd.fetch_text(session, url, cache=cache, ttl=60)
+    entry = cache.get(url)
+    assert text == 'fetched'
+    assert entry.body == 'fetched'
+    assert entry.last_modified == 'Wed, 21 Oct 2015 07:28:00 GMT'
 
 
 @asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value='')
@@ -195,7 +226,15 @@ async def test_fetch_news_page_00(fetch_text):
             await apd.fetch_news_page(session, page)
         except Exception:
             pass
-    fetch_text.assert_called_once_with(session, apd.APD_URL, params)
+    fetch_text.assert_called_once_with(
+        session,
+        apd.APD_URL,
+        params,
+        cache=None,
+        ttl=constant.LISTING_TTL,
+        scheduler=None,
+        archive=None,
+    )
 
 
 @asynctest.patch("scrapd.core.apd.fetch_text", return_value='')
@@ -208,19 +247,59 @@ async def test_fetch_detail_page_00(fetch_text):
             await apd.fetch_detail_page(session, url)
         except Exception:
             pass
-    fetch_text.assert_called_once_with(session, url)
+    fetch_text.assert_called_once_with(session, url, cache=None, ttl=constant.DETAIL_TTL, scheduler=None, archive=None)
 
 
 @asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value='Not empty page')
 @pytest.mark.asyncio
 async def test_fetch_and_parse_01(page, mocker):
     """Ensure a page that cannot be parsed returns an exception."""
-    mocker.patch("scrapd.core.apd.parse_page", return_value={})
+    mocker.patch("scrapd.core.apd.parse_detail_page", return_value=apd.ParsedPage({}, False))
     with pytest.raises(RetryError):
         apd.fetch_and_parse.retry.stop = stop_after_attempt(1)
         await apd.fetch_and_parse(None, 'url')
 
 
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-50-3'))
+@pytest.mark.asyncio
+async def test_fetch_and_parse_02(page):
+    """Ensure a page can be parsed by a worker process."""
+    url = fake.uri()
+    with ProcessPoolExecutor(1, initializer=apd.init_worker) as executor:
+        report = await apd.fetch_and_parse(None, url, context=apd.CrawlContext(executor=executor))
+    expected = apd.parse_page(load_test_page('traffic-fatality-50-3'), url)
+    expected.link = url
+    assert report == expected
+
+
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-50-3'))
+@pytest.mark.asyncio
+async def test_fetch_and_parse_03(page, mocker, tmp_path):
+    """Ensure an identical page is not parsed again."""
+    memo = ParseMemo(tmp_path, version='1.0.0')
+    context = apd.CrawlContext(memo=memo)
+    expected = await apd.fetch_and_parse(None, 'url', context=context)
+    parse_detail_page = mocker.patch("scrapd.core.apd.parse_detail_page")
+    actual = await apd.fetch_and_parse(None, 'url', context=context)
+    parse_detail_page.assert_not_called()
+    assert actual == expected
+    assert context.progress['memoized'] == 1
+
+
+@pytest.mark.parametrize('page,short_circuited', [
+    pytest.param('traffic-fatality-2-3', False, id='incomplete-twitter'),
+    pytest.param('traffic-fatality-50-3', True, id='complete-twitter'),
+])
+def test_parse_detail_page_00(page, short_circuited):
+    """Ensure the tiered parsing produces the same reports."""
+    content = load_test_page(page)
+    expected = apd.parse_detail_page(content, page)
+    actual = apd.parse_detail_page(content, page, tiered=True)
+    assert actual.report == expected.report
+    assert not expected.short_circuited
+    assert actual.short_circuited == short_circuited
+
+
 @pytest.mark.parametrize('page_dump', [
     pytest.param('traffic-fatality-1-2', id='dumped'),
 ])
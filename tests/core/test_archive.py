@@ -0,0 +1,108 @@
+"""Test the archive module."""
+import gzip
+
+import aiohttp
+from aioresponses import aioresponses
+import asynctest
+import pytest
+
+from scrapd.core import apd
+from scrapd.core import archive
+from scrapd.core.archive import PageArchive
+from scrapd.core.cache import ResponseCache
+
+
+def test_record_00():
+    """Ensure a record survives a round trip."""
+    record = archive.to_record('http://example.com', 200, {'ETag': '"abc"'}, 'body ✓', '2020-01-11T00:00:00+00:00')
+    page = archive.from_record(record)
+    assert page.url == 'http://example.com'
+    assert page.status == 200
+    assert page.headers == {'ETag': '"abc"', 'Content-Length': '8'}
+    assert page.body == 'body ✓'
+    assert page.date == '2020-01-11T00:00:00+00:00'
+
+
+def test_record_01():
+    """Ensure the transfer headers are not archived."""
+    record = archive.to_record('http://example.com', 200, {'Content-Encoding': 'gzip'}, 'body', '')
+    assert b'Content-Encoding' not in record
+
+
+def test_record_02():
+    """Ensure a non-standard status is archived."""
+    record = archive.to_record('http://example.com', 599, {}, 'body', '')
+    assert archive.from_record(record).status == 599
+
+
+def test_write_00(tmp_path):
+    """Ensure the pages are appended and indexed."""
+    page_archive = PageArchive(tmp_path / 'pages.warc.gz')
+    first = page_archive.write('http://example.com/1', 200, {}, 'first')
+    second = page_archive.write('http://example.com/2', 200, {}, 'second')
+    assert first == 0
+    assert second > first
+    assert 'http://example.com/2' in page_archive
+    assert page_archive.read('http://example.com/2').body == 'second'
+
+
+def test_write_01(tmp_path):
+    """Ensure the archive is a valid gzip stream."""
+    page_archive = PageArchive(tmp_path / 'pages.warc.gz')
+    page_archive.write('http://example.com/1', 200, {}, 'first')
+    page_archive.write('http://example.com/2', 200, {}, 'second')
+    content = gzip.decompress(page_archive.path.read_bytes())
+    assert content.count(b'WARC/1.0') == 2
+
+
+def test_read_00(tmp_path):
+    """Ensure the latest version of a page is read."""
+    page_archive = PageArchive(tmp_path / 'pages.warc.gz')
+    page_archive.write('http://example.com', 200, {}, 'old')
+    page_archive.write('http://example.com', 200, {}, 'new')
+    reloaded = PageArchive(tmp_path / 'pages.warc.gz')
+    assert reloaded.read('http://example.com').body == 'new'
+
+
+def test_read_01(tmp_path):
+    """Ensure a missing page returns `None`."""
+    page_archive = PageArchive(tmp_path / 'pages.warc.gz')
+    assert page_archive.read('http://example.com') is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_text_00(tmp_path):
+    """Ensure the fetched pages are archived."""
+    page_archive = PageArchive(tmp_path / 'pages.warc.gz')
+    with aioresponses() as m:
+        m.get(f'{apd.APD_URL}?page=1', body='news page')
+        async with aiohttp.ClientSession() as session:
+            await apd.fetch_news_page(session, 2, apd.CrawlContext(archive=page_archive))
+    assert page_archive.read(f'{apd.APD_URL}?page=1').body == 'news page'
+
+
+@pytest.mark.asyncio
+async def test_fetch_text_01(tmp_path):
+    """Ensure the pages served by the cache without any request are archived."""
+    page_archive = PageArchive(tmp_path / 'pages.warc.gz')
+    cache = ResponseCache(tmp_path / 'cache')
+    cache.set(apd.APD_URL, {}, 'cached', {'ETag': '"abc"'})
+    text = await apd.fetch_text(None, apd.APD_URL, cache=cache, ttl=60, archive=page_archive)
+    page = page_archive.read(apd.APD_URL)
+    assert text == 'cached'
+    assert page.body == 'cached'
+    assert page.headers['ETag'] == '"abc"'
+
+
+@pytest.mark.asyncio
+async def test_fetch_text_02(tmp_path):
+    """Ensure the revalidated pages are archived."""
+    page_archive = PageArchive(tmp_path / 'pages.warc.gz')
+    cache = ResponseCache(tmp_path / 'cache')
+    cache.set(apd.APD_URL, {}, 'cached', {'ETag': '"abc"'})
+    not_modified = apd.Response(apd.APD_URL, 304, {}, '')
+    with asynctest.patch('scrapd.core.apd.get', return_value=not_modified) as get:
+        text = await apd.fetch_text(None, apd.APD_URL, cache=cache, ttl=0, archive=page_archive)
+    assert get.called
+    assert text == 'cached'
+    assert page_archive.read(apd.APD_URL).body == 'cached'
@@ -137,6 +137,25 @@ deceased_tag_scenarios = [
 ]
 
 
+class TestSlicePage:
+    """Group the test cases for the `article.slice_page` function."""
+
+    @pytest.mark.parametrize('page', [s['page'] for s in page_scenarios if s.get('page')])
+    def test_slice_page_00(self, page):
+        """Ensure the regions containing the fields are kept."""
+        p = load_test_page(page)
+        actual = article.slice_page(p)
+        assert len(actual) < len(p) / 4
+        assert 'twitter:description' in actual
+        assert 'Deceased' in actual
+        assert 'service-links' not in actual
+
+    def test_slice_page_01(self):
+        """Ensure the whole page is kept when the body cannot be located."""
+        page = '<p><strong>Case:</strong>18-1591949</p>'
+        assert article.slice_page(page) == page
+
+
 class TestPageParseContent:
     """Group the test cases for the `parsing.parse_page_content` function."""
 
@@ -152,6 +171,36 @@ class TestPageParseContent:
         else:
             assert actual == expected
 
+    @pytest.mark.parametrize('page', [s['page'] for s in page_scenarios if s.get('page')])
+    def test_parse_page_content_engines(self, page, monkeypatch):
+        """Ensure the HTML engines produce the same reports."""
+        pytest.importorskip('lxml')
+        p = load_test_page(page)
+        reports = []
+        for engine in article.HTML_ENGINES:
+            monkeypatch.setattr(article, 'HTML_ENGINE', engine)
+            reports.append(article.parse_content(p))
+        assert reports[0] == reports[1]
+
+    @pytest.mark.parametrize('page', [s['page'] for s in page_scenarios if s.get('page')])
+    def test_parse_page_content_known(self, page):
+        """Ensure the known fields are not extracted again."""
+        p = load_test_page(page)
+        expected, _ = article.parse_content(p)
+        known = model.Report(case=expected.case, date=expected.date, location='Known location')
+        actual, _ = article.parse_content(p, known)
+        assert actual.location == known.location
+        assert actual.fatalities == expected.fatalities
+        assert actual.notes == expected.notes
+
+    def test_parse_page_content_04(self, monkeypatch):
+        """Ensure the soup is not built for the pages without any deceased field."""
+        monkeypatch.setattr(article, 'to_soup', None)
+        page = '<p><strong>Case: </strong>19-2291933</p><p><strong>Date: </strong>Saturday, August 17, 2019</p>'
+        actual, err = article.parse_content(page)
+        assert actual.case == '19-2291933'
+        assert 'could not retrieve the deceased information' in err
+
     def test_parse_page_content_01(self):
         """Ensure a missing case number raises an exception."""
         with pytest.raises(ValueError):
@@ -0,0 +1,56 @@
+"""Test the cache module."""
+import time
+
+from scrapd.core.cache import CacheEntry
+from scrapd.core.cache import ResponseCache
+
+
+def test_cache_url_00():
+    """Ensure the query string is part of the cache key."""
+    actual = ResponseCache.cache_url('http://example.com', {'page': 2})
+    assert actual == 'http://example.com?page=2'
+
+
+def test_get_00(tmp_path):
+    """Ensure a missing entry returns `None`."""
+    cache = ResponseCache(tmp_path)
+    assert cache.get('http://example.com') is None
+
+
+def test_get_01(tmp_path):
+    """Ensure a corrupted entry is ignored."""
+    cache = ResponseCache(tmp_path)
+    cache.set('http://example.com', {}, 'body')
+    cache.path('http://example.com').write_text('{')
+    assert cache.get('http://example.com') is None
+
+
+def test_set_00(tmp_path):
+    """Ensure an entry is stored with its validators."""
+    cache = ResponseCache(tmp_path)
+    cache.set('http://example.com', {'page': 1}, 'body', {'ETag': '"abc"'})
+    entry = cache.get('http://example.com', {'page': 1})
+    assert entry.body == 'body'
+    assert entry.etag == '"abc"'
+    assert cache.get('http://example.com') is None
+
+
+def test_purge_00(tmp_path):
+    """Ensure all the entries are removed."""
+    cache = ResponseCache(tmp_path / 'cache')
+    cache.set('http://example.com', {}, 'body')
+    cache.purge()
+    assert cache.get('http://example.com') is None
+
+
+def test_is_fresh_00():
+    """Ensure the freshness depends on the TTL."""
+    entry = CacheEntry(url='http://example.com', body='', stored_at=time.time() - 10)
+    assert entry.is_fresh(60)
+    assert not entry.is_fresh(5)
+
+
+def test_conditional_headers_00():
+    """Ensure the conditional headers are built from the validators."""
+    entry = CacheEntry(url='', body='', etag='"abc"', last_modified='yesterday')
+    assert entry.conditional_headers() == {'If-None-Match': '"abc"', 'If-Modified-Since': 'yesterday'}
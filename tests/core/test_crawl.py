@@ -0,0 +1,382 @@
+"""Test the crawl module."""
+import asyncio
+import datetime
+import time
+from urllib.parse import urljoin
+
+import asynctest
+from loguru import logger
+import pytest
+
+from scrapd.core import apd
+from scrapd.core import crawl
+from scrapd.core import model
+from scrapd.core.index import PageIndex
+from scrapd.core.replay import ReplaySession
+from scrapd.core.state import CrawlState
+from tests.test_common import load_test_page
+from tests.test_common import TEST_DATA_DIR
+from tests.test_common import write_news_pages
+from tests.test_common import write_replay_dir
+
+# Disable logging for the tests.
+logger.remove()
+
+
+@pytest.fixture
+def news_page(scope='session'):
+    """Returns the test news page."""
+    page_fd = TEST_DATA_DIR / 'news_page.html'
+    return page_fd.read_text()
+
+
+@pytest.mark.parametrize('pages,fanout,expected', (
+    (-1, False, 1),
+    (-1, True, 27),
+    (5, True, 4),
+    (1, True, 1),
+))
+def test_count_pages_ahead_00(news_page, pages, fanout, expected):
+    """Ensure all the following news pages are fetched ahead in fan-out mode."""
+    assert crawl.count_pages_ahead(news_page, 1, 1, pages, fanout) == expected
+
+
+@pytest.mark.parametrize('date,lag,expected', (
+    (datetime.date(2018, 12, 5), datetime.timedelta(0), True),
+    (datetime.date(2018, 12, 4), datetime.timedelta(0), False),
+    (datetime.date(2018, 12, 4), datetime.timedelta(days=1), True),
+))
+def test_is_published_before_00(news_page, date, lag, expected):
+    """Ensure a news page is detected as listing a news published before a date, lag included."""
+    assert crawl.is_published_before(news_page, date, lag) == expected
+
+
+def test_is_published_before_01():
+    """Ensure a news page without publication dates is considered as published before any date."""
+    assert crawl.is_published_before('', datetime.date(2000, 1, 1))
+
+
+@pytest.mark.parametrize('publication_date,expected', (
+    (None, True),
+    (datetime.date(2019, 1, 31), True),
+    (datetime.date(2019, 3, 1), True),
+    (datetime.date(2018, 12, 31), False),
+    (datetime.date(2019, 6, 1), False),
+))
+def test_date_filter_may_accept_00(publication_date, expected):
+    """Ensure the reports published outside of the time range, lag included, are rejected."""
+    lag = datetime.timedelta(days=90)
+    date_filter = crawl.DateFilter(datetime.date(2019, 1, 1), datetime.date(2019, 1, 31), lag=lag)
+    assert date_filter.may_accept(publication_date) == expected
+
+
+def test_date_filter_prefilter_00():
+    """Ensure the filter is done once a news was published before the start date."""
+    lag = datetime.timedelta(days=90)
+    date_filter = crawl.DateFilter(datetime.date(2019, 1, 1), datetime.date(2019, 1, 31), lag=lag)
+    publication_dates = {'a': datetime.date(2019, 1, 2), 'b': datetime.date(2018, 12, 30)}
+    assert date_filter.prefilter(['a', 'b', 'c'], publication_dates) == ['a', 'c']
+    assert date_filter.done
+
+
+def test_date_filter_prefilter_01():
+    """Ensure the links are kept when the prefilter is disabled."""
+    date_filter = crawl.DateFilter(datetime.date(2019, 1, 1), datetime.date(2019, 1, 31))
+    assert date_filter.prefilter(['a'], {'a': datetime.date(2018, 1, 1)}) == ['a']
+    assert not date_filter.done
+
+
+@pytest.mark.parametrize('date,has_from,expected', (
+    (datetime.date(2018, 12, 31), True, True),
+    (datetime.date(2019, 1, 1), True, False),
+    (datetime.date(2018, 12, 31), False, False),
+))
+def test_date_filter_passed_00(date, has_from, expected):
+    """Ensure only the reports before the start date specified by the user end the news page."""
+    date_filter = crawl.DateFilter(datetime.date(2019, 1, 1), datetime.date(2019, 1, 31), has_from)
+    assert date_filter.passed(model.Report(case='19-123456', date=date)) == expected
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-2-3'))
+@pytest.mark.asyncio
+async def test_date_filtering_00(fake_details, fake_news):
+    """Ensure the date filtering do not fetch unnecessary data."""
+    expected = 2
+    data, actual = await crawl.async_retrieve(pages=-1, from_="2050-01-02", to="2050-01-03")
+    assert actual == expected
+    assert isinstance(data, list)
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-2-3'))
+@pytest.mark.asyncio
+async def test_date_filtering_01(fake_details, fake_news):
+    """Ensure the date filtering do not fetch unnecessary data."""
+    data, _ = await crawl.async_retrieve(pages=-5, from_="2019-01-02", to="2019-01-03")
+    assert isinstance(data, list)
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch(
+    "scrapd.core.apd.fetch_detail_page",
+    side_effect=[load_test_page(page) for page in ['traffic-fatality-2-3'] + ['traffic-fatality-71-2'] * 14])
+@pytest.mark.asyncio
+async def test_date_filtering_02(fake_details, fake_news):
+    """Ensure the date filtering do not fetch unnecessary data."""
+    data, page_count = await crawl.async_retrieve(from_="2019-01-16", to="2019-01-16")
+    assert isinstance(data, list)
+    assert len(data) == 1
+    assert page_count == 2
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", side_effect=[load_test_page('traffic-fatality-50-3')] * 15)
+@pytest.mark.asyncio
+async def test_both_fatalities_from_one_incident(fake_details, fake_news):
+    data, _ = await crawl.async_retrieve(pages=-1, from_="2019-08-16", to="2019-08-18", attempts=1, backoff=1)
+    assert isinstance(data, list)
+    assert len(data) == 1
+    assert len(data[0].fatalities) == 2
+    assert data[0].fatalities[0].age == 36
+    assert data[0].fatalities[1].age == 27
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=5', '296-page=27']])
+@asynctest.patch(
+    "scrapd.core.apd.fetch_detail_page",
+    side_effect=[load_test_page(page) for page in ['traffic-fatality-2-3'] + ['traffic-fatality-71-2'] * 14])
+@pytest.mark.asyncio
+async def test_date_filtering_03(fake_details, fake_news):
+    """Ensure the news pages fetched ahead do not change the results."""
+    data, page_count = await crawl.async_retrieve(from_="2019-01-16", to="2019-01-16", prefetch=2)
+    assert len(data) == 1
+    assert page_count == 2
+    assert [c[0][1] for c in fake_news.call_args_list] == [1, 2, 3, 4]
+
+
+def fake_state(path, links):
+    """Create a state knowing some links of the first news page."""
+    state = CrawlState(path)
+    for i, link in enumerate(links):
+        state.add(
+            model.Report(case=f'19-00000{i}', date=datetime.date(2019, 1, 10), link=urljoin(apd.PAGE_DETAILS_URL,
+                                                                                            link)))
+    return state
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page", return_value=load_test_page('296'))
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-2-3'))
+@pytest.mark.asyncio
+async def test_incremental_00(fake_details, fake_news, tmp_path):
+    """Ensure the incremental mode only fetches the unknown detail pages."""
+    state = fake_state(tmp_path / 'state.json', ['/news/traffic-fatality-72-1', '/news/traffic-fatality-73-2'])
+    data, _ = await crawl.async_retrieve(pages=1, from_="2019-01-01", to="2019-01-31", state=state)
+    assert fake_details.call_count == 4
+    assert sorted(report.case for report in data) == ['19-000000', '19-000001', '19-0161105']
+    assert len(state.reports) == 6
+    assert (tmp_path / 'state.json').exists()
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page", return_value=load_test_page('296'))
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-2-3'))
+@pytest.mark.asyncio
+async def test_incremental_01(fake_details, fake_news, tmp_path):
+    """Ensure the incremental mode stops at the first news page which is entirely known."""
+    links = [link for link, *_ in apd.extract_traffic_fatalities_page_details_link(load_test_page('296'))]
+    state = fake_state(tmp_path / 'state.json', links + ['/news/older'])
+    data, page_count = await crawl.async_retrieve(from_="2019-01-01", to="2019-01-31", state=state)
+    assert page_count == 1
+    assert fake_details.call_count == 0
+    assert len(data) == 7
+
+
+@pytest.mark.asyncio
+async def test_incremental_02(tmp_path):
+    """Ensure the reports parsed so far are saved when the caller stops iterating."""
+    write_replay_dir(tmp_path)
+    state = CrawlState(tmp_path / 'state.json')
+    reports = crawl.aiter_reports(replay_dir=tmp_path, state=state)
+    report = await reports.__anext__()
+    await reports.aclose()
+    state.load()
+    assert report.link in state
+
+
+@pytest.mark.asyncio
+async def test_prefetch_news_pages_00():
+    """Ensure the prefetched pages do not go past the page limit."""
+    prefetched = {2: None}
+    with asynctest.patch("scrapd.core.apd.fetch_news_page", return_value='') as fake_news:
+        crawl.prefetch_news_pages(None, prefetched, 1, 3, pages=3)
+        await crawl.cancel_tasks([prefetched[3]])
+    assert list(prefetched) == [2, 3]
+    fake_news.assert_called_once_with(None, 3, None)
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page", side_effect=ValueError)
+@pytest.mark.asyncio
+async def test_async_retrieve_00(fake_news):
+    """Ensure `async_retrieve` raises `ValueError` when `fetch_news_page` fails to retrieve data."""
+    with pytest.raises(ValueError):
+        await crawl.async_retrieve()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('to,pages,expected', (
+    pytest.param(datetime.date(2019, 3, 1), -1, 1, id='first-page'),
+    pytest.param(datetime.date(2018, 5, 6), -1, 10, id='published-on-end-date'),
+    pytest.param(datetime.date(2018, 5, 7), -1, 10, id='published-before-end-date'),
+    pytest.param(datetime.date(2010, 1, 1), -1, 28, id='last-page'),
+    pytest.param(datetime.date(2010, 1, 1), 5, 5, id='page-limit'),
+))
+async def test_seek_news_page_00(tmp_path, to, pages, expected):
+    """Ensure the first news page listing a news published before the end date is found in a few requests."""
+    write_news_pages(tmp_path, 28)
+    prefetched = {}
+    async with ReplaySession(tmp_path) as session:
+        actual = await crawl.seek_news_page(session, to, datetime.timedelta(0), prefetched, pages)
+    assert actual == expected
+    assert len(prefetched) <= 6
+
+
+@pytest.mark.asyncio
+async def test_seek_news_page_01(tmp_path):
+    """Ensure the end date is shifted by the publication lag."""
+    write_news_pages(tmp_path, 28)
+    async with ReplaySession(tmp_path) as session:
+        actual = await crawl.seek_news_page(session, datetime.date(2018, 5, 6), datetime.timedelta(days=30), {})
+    assert actual == 9
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('shift,expected,probes', (
+    pytest.param(0, 10, 2, id='same-pages'),
+    pytest.param(3, 13, 3, id='moved-pages'),
+))
+async def test_seek_news_page_02(tmp_path, shift, expected, probes):
+    """Ensure the index guesses the first news page listing a news published before the end date."""
+    index = PageIndex(tmp_path / 'index.json')
+    indexed_dir = tmp_path / 'indexed'
+    indexed_dir.mkdir()
+    write_news_pages(indexed_dir, 28)
+    async with ReplaySession(indexed_dir) as session:
+        for page in range(1, 29):
+            await crawl.retrieve_news_page(session, page, {}, index=index)
+
+    pages_dir = tmp_path / 'pages'
+    pages_dir.mkdir()
+    write_news_pages(pages_dir, 28, shift)
+    prefetched = {}
+    async with ReplaySession(pages_dir) as session:
+        to_date = datetime.date(2018, 5, 6)
+        actual = await crawl.seek_news_page(session, to_date, datetime.timedelta(0), prefetched, index=index)
+    assert actual == expected
+    assert len(prefetched) == probes
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('seek,to,expected', (
+    pytest.param(True, '2018-05-06', 7, id='seek'),
+    pytest.param(True, None, 1, id='no-end-date'),
+    pytest.param(False, '2018-05-06', 1, id='no-seek'),
+))
+async def test_async_retrieve_01(tmp_path, seek, to, expected):
+    """Ensure the crawl starts at the news page found by seeking."""
+    write_news_pages(tmp_path, 28)
+    _, page = await crawl.async_retrieve(replay_dir=tmp_path, to=to, seek=seek)
+    assert page == expected
+
+
+@pytest.mark.asyncio
+async def test_async_retrieve_02(tmp_path, mocker):
+    """Ensure the detail pages listed on several news pages are only fetched once in fan-out mode."""
+    links = write_replay_dir(tmp_path, pages=2)
+    fetch_detail_page = mocker.spy(apd, 'fetch_detail_page')
+    context = apd.CrawlContext()
+    data = [report async for report in crawl.aiter_reports(replay_dir=tmp_path, fanout=True, context=context)]
+    progress = context.progress
+    assert progress['pages'] == 2
+    assert progress['duplicates'] == len(links)
+    assert fetch_detail_page.call_count == len(links)
+    assert sorted(report.crash for report in data) == [2, 71, 72, 73]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('from_,pages,fetched', (
+    pytest.param('2019-02-01', 1, 1, id='last-page'),
+    pytest.param('2018-12-01', 4, 28, id='next-pages'),
+))
+async def test_async_retrieve_03(tmp_path, mocker, from_, pages, fetched):
+    """Ensure no news page is fetched ahead once the current one is known to be the last one."""
+    write_news_pages(tmp_path, 28, next_links=True)
+    fetch_news_page = mocker.spy(apd, 'fetch_news_page')
+    _, page_count = await crawl.async_retrieve(replay_dir=tmp_path, from_=from_, prefilter=True, fanout=True)
+    assert page_count == pages
+    assert fetch_news_page.call_count == fetched
+
+
+@pytest.mark.asyncio
+async def test_schedule_reports_00():
+    """Ensure the retries of a detail page are cancelled along with its task."""
+    async with ReplaySession(TEST_DATA_DIR) as session:
+        link = 'http://austintexas.gov/news/missing'
+        tasks = crawl.schedule_reports(session, [link], attempts=3, backoff=60)
+        await asyncio.sleep(0.1)
+        start = time.monotonic()
+        await crawl.cancel_tasks(tasks.values())
+    assert time.monotonic() - start < 1
+    assert tasks[link].cancelled()
+
+
+@pytest.mark.asyncio
+async def test_async_retrieve_04(tmp_path, mocker):
+    """Ensure a session owned by the caller is shared by the crawls and left open."""
+    write_replay_dir(tmp_path)
+    async with ReplaySession(tmp_path) as session:
+        close = mocker.spy(session, 'close')
+        first, _ = await crawl.async_retrieve(session=session)
+        second, _ = await crawl.async_retrieve(session=session)
+        assert close.call_count == 0
+    assert sorted(report.crash for report in first) == [2, 71, 72, 73]
+    assert sorted(report.crash for report in second) == [2, 71, 72, 73]
+
+
+@pytest.mark.asyncio
+async def test_async_retrieve_05(tmp_path, mocker):
+    """Ensure the reports are yielded in the order of the links, whatever the order in which they are fetched."""
+    links = apd.generate_detail_page_urls(write_replay_dir(tmp_path))
+    fetch_detail_page = apd.fetch_detail_page
+
+    async def fetch_in_reverse_order(session, url, *args):
+        await asyncio.sleep(0.01 * (len(links) - links.index(url)))
+        return await fetch_detail_page(session, url, *args)
+
+    mocker.patch('scrapd.core.apd.fetch_detail_page', side_effect=fetch_in_reverse_order)
+    res, _ = await crawl.async_retrieve(replay_dir=tmp_path)
+    positions = [links.index(report.link) for report in res]
+    assert len(positions) > 1
+    assert positions == sorted(positions)
+
+
+@pytest.mark.asyncio
+async def test_async_retrieve_06(tmp_path, mocker):
+    """Ensure the detail pages following a report before the start date are cancelled without waiting for them."""
+    links = apd.generate_detail_page_urls(write_replay_dir(tmp_path))
+    fetch_detail_page = apd.fetch_detail_page
+
+    async def fetch_first_only(session, url, *args):
+        if url != links[0]:
+            await asyncio.sleep(10)
+        return await fetch_detail_page(session, url, *args)
+
+    mocker.patch('scrapd.core.apd.fetch_detail_page', side_effect=fetch_first_only)
+    start = time.monotonic()
+    res, _ = await crawl.async_retrieve(replay_dir=tmp_path, from_='2050-01-01')
+    assert time.monotonic() - start < 1
+    assert res == []
@@ -89,3 +89,58 @@ def test_parse_date_field_00(input_, expected):
     """Ensure a date field gets parsed correctly."""
     actual = regex.match_date_field(input_)
     assert actual == expected
+
+
+@pytest.mark.parametrize('input_,expected', (
+    ('January 5, 2019', datetime.date(2019, 1, 5)),
+    ('Saturday, August 17, 2019', datetime.date(2019, 8, 17)),
+    ('Wednesday, Oct  3, 2018', datetime.date(2018, 10, 3)),
+    ('Sept 5 2019', datetime.date(2019, 9, 5)),
+    ('1/5/19', datetime.date(2019, 1, 5)),
+    ('02/09/80', datetime.date(1980, 2, 9)),
+    ('6-9-70', datetime.date(1970, 6, 9)),
+    ('6-9-68', datetime.date(2068, 6, 9)),
+    ('11/13/1991', datetime.date(1991, 11, 13)),
+    ('2019-01-05', datetime.date(2019, 1, 5)),
+    ('13/01/2019', None),
+    ('February 30, 2019', None),
+    ('Night of May 22 2019', None),
+    ('age', None),
+))
+def test_match_date_format_00(input_, expected):
+    """Ensure only the dates matching a format are parsed."""
+    assert date_utils.match_date_format(input_) == expected
+
+
+@pytest.mark.parametrize('input_,expected', (
+    ('5:12 p.m.', datetime.time(17, 12)),
+    ('01:14a.m.', datetime.time(1, 14)),
+    ('12:47 p.M.', datetime.time(12, 47)),
+    ('12:05 AM', datetime.time(0, 5)),
+    ('8 p.m.', datetime.time(20, 0)),
+    ('18:46 pm', datetime.time(18, 46)),
+    ('00:24 a.m.', datetime.time(0, 24)),
+    ('05:16', datetime.time(5, 16)),
+    ('17 pm', None),
+    ('54:34', None),
+    ('4:66 pm', None),
+    ('8', None),
+))
+def test_match_time_format_00(input_, expected):
+    """Ensure only the times matching the format are parsed."""
+    assert date_utils.match_time_format(input_) == expected
+
+
+def test_parse_date_02(mocker):
+    """Ensure the dates matching a format are not parsed by dateparser, and the results are memoized."""
+    date_utils.cached_parse_date.cache_clear()
+    parse = mocker.patch('scrapd.core.date_utils.dateparser.parse')
+    assert date_utils.parse_date('January 5, 2019') == datetime.date(2019, 1, 5)
+    assert date_utils.parse_date('January 5, 2019') == datetime.date(2019, 1, 5)
+    assert date_utils.cached_parse_date.cache_info().hits == 1
+    parse.assert_not_called()
+
+
+def test_parse_date_03():
+    """Ensure dateparser only looks for English dates."""
+    assert date_utils.parse_date('age', default=datetime.date.min) == datetime.date.min
@@ -376,6 +376,27 @@ class TestFatality:
         actual = deceased.process_deceased_field(input_)
         assert [fatality for fatality, err in actual] == expected
 
+    @pytest.mark.parametrize('input_,expected', (
+        ('Rommel Perez, Hispanic male (D.O.B. 11-13-91)', deceased.parse_comma_delimited_deceased_field),
+        ('Eva Marie Gonzales | Hispanic female | 01/15/1994', deceased.parse_pipe_delimited_deceased_field),
+        ('Ernesto Gonzales Garcia, H/M, (DOB: 11/15/1977)', deceased.parse_comma_delimited_deceased_field),
+        ('Timothy Morgan White male 02/09/80', deceased.parse_space_delimited_deceased_field),
+        ('Hispanic male, 19 years of age', deceased.parse_age_deceased_field),
+        ('Unidentified White male', deceased.parse_unidentified),
+        ('Not a deceased field', None),
+    ))
+    def test_classify_deceased_field(self, input_, expected):
+        """Ensure the deceased field is classified for the first parse method which can succeed."""
+        assert deceased.classify_deceased_field(input_) == expected
+
+    def test_process_deceased_field_stats(self, mocker):
+        """Ensure the parse methods preceding the classified one are skipped, and the hits are counted."""
+        mocker.patch.dict(deceased.stats, clear=True)
+        comma = mocker.patch('scrapd.core.deceased.parse_comma_delimited_deceased_field')
+        deceased.process_deceased_field('Hispanic male, 19 years of age')
+        comma.assert_not_called()
+        assert deceased.stats == {'parse_age_deceased_field': 1}
+
     @pytest.mark.parametrize(
         'input_,expected',
         [
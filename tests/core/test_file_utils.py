@@ -0,0 +1,11 @@
+"""Test the file_utils module."""
+from scrapd.core import file_utils
+
+
+def test_atomic_write_00(tmp_path):
+    """Ensure the file and its parent directories are created, and the temporary file is removed."""
+    path = tmp_path / 'a' / 'b' / 'file.json'
+    file_utils.atomic_write(path, '{}')
+    file_utils.atomic_write(path, '[]')
+    assert path.read_text() == '[]'
+    assert [p.name for p in path.parent.iterdir()] == ['file.json']
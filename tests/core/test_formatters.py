@@ -1,5 +1,6 @@
 """Test the formatter module."""
 import datetime
+import json
 import sys
 
 import pytest
@@ -9,7 +10,9 @@ from scrapd.core.formatter import (
     CSVFormatter,
     Formatter,
     JSONFormatter,
+    NDJSONFormatter,
     PythonFormatter,
+    to_json,
 )
 from scrapd.core import model
 
@@ -45,6 +48,32 @@ class TestFormatter:
         out, _ = capsys.readouterr()
         assert '"dob": "1978-06-19"' in out
 
+    @pytest.mark.parametrize('count', (0, 1, 2))
+    def test_formatter_json_stream(self, capsys, count):
+        """Ensure the results of an iterator are printed as a JSON list."""
+        results = RESULTS * count
+        f = JSONFormatter(output=sys.stdout)
+        f.printer(iter(results))
+        out, _ = capsys.readouterr()
+        assert out == to_json(results) + '\n'
+
+    def test_formatter_ndjson(self, capsys):
+        """Ensure each result is printed as a JSON object on its own line."""
+        f = NDJSONFormatter(output=sys.stdout)
+        f.printer(iter(RESULTS * 2))
+        out, _ = capsys.readouterr()
+        lines = out.splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])['case'] == '19-2540190'
+        assert json.loads(lines[1]) == json.loads(to_json(RESULTS[0]))
+
+    def test_formatter_count_stream(self, capsys):
+        """Ensure Count formatter counts the results of an iterator."""
+        f = CountFormatter(output=sys.stdout)
+        f.printer(iter(RESULTS * 3))
+        out, _ = capsys.readouterr()
+        assert out.strip() == "3"
+
     def test_formatter_typeerror(self):
         """Ensure some correct text is in the output."""
         f = JSONFormatter(output=sys.stdout)
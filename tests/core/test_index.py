@@ -0,0 +1,83 @@
+"""Test the index module."""
+import datetime
+
+from scrapd.core.index import IndexEntry
+from scrapd.core.index import PageIndex
+
+PUBLICATION_DATES = [
+    ('/news/traffic-fatality-3-3', datetime.date(2019, 1, 20)),
+    ('/news/traffic-fatality-2-3', datetime.date(2019, 1, 18)),
+]
+
+
+def test_update_00(tmp_path):
+    """Ensure a news page is indexed."""
+    index = PageIndex(tmp_path / 'index.json')
+    assert index.update(2, PUBLICATION_DATES) == 0
+    assert index.pages == {
+        2: IndexEntry(datetime.date(2019, 1, 18), datetime.date(2019, 1, 20), PUBLICATION_DATES[0][0],
+                      PUBLICATION_DATES[1][0])
+    }
+
+
+def test_update_01(tmp_path):
+    """Ensure the indexed pages are shifted when their first news moved."""
+    index = PageIndex(tmp_path / 'index.json')
+    index.update(1, [('/news/a', datetime.date(2019, 1, 2))])
+    index.update(2, PUBLICATION_DATES)
+    assert index.update(3, [('/news/traffic-fatality-3-3', datetime.date(2019, 1, 20))]) == 1
+    assert sorted(index.pages) == [2, 3]
+
+
+def test_drift_00(tmp_path):
+    """Ensure the drift is detected from the last news of an indexed page."""
+    index = PageIndex(tmp_path / 'index.json')
+    index.update(2, PUBLICATION_DATES)
+    assert index.drift(4, [('/news/traffic-fatality-2-3', datetime.date(2019, 1, 18))]) == 1
+
+
+def test_update_02(tmp_path):
+    """Ensure a news page without news is not indexed."""
+    index = PageIndex(tmp_path / 'index.json')
+    assert index.update(1, []) == 0
+    assert index.pages == {}
+
+
+def test_guess_00(tmp_path):
+    """Ensure the first page listing a news published before a date is guessed."""
+    index = PageIndex(tmp_path / 'index.json')
+    assert index.guess(datetime.date(2019, 1, 1)) is None
+    index.update(1, [('/news/a', datetime.date(2019, 2, 1))])
+    index.update(2, PUBLICATION_DATES)
+    assert index.guess(datetime.date(2019, 1, 19)) == 2
+    assert index.guess(datetime.date(2019, 3, 1)) == 1
+    assert index.guess(datetime.date(2019, 1, 1)) == 3
+    assert index.guess(datetime.date(2019, 1, 1), datetime.timedelta(days=20)) == 2
+
+
+def test_save_load_00(tmp_path):
+    """Ensure the index survives a round trip to the disk."""
+    index = PageIndex(tmp_path / 'dir' / 'index.json')
+    index.update(2, PUBLICATION_DATES)
+    loaded = PageIndex(tmp_path / 'dir' / 'index.json')
+    loaded.load()
+    assert loaded.pages == index.pages
+
+
+def test_load_00(tmp_path):
+    """Ensure an invalid index file results in an empty index."""
+    index_file = tmp_path / 'index.json'
+    index_file.write_text('{"pages": {"1": {"oldest": "invalid"}}}')
+    index = PageIndex(index_file)
+    index.load()
+    assert index.pages == {}
+
+
+def test_purge_00(tmp_path):
+    """Ensure the index is removed from the disk."""
+    index = PageIndex(tmp_path / 'index.json')
+    index.update(2, PUBLICATION_DATES)
+    index.purge()
+    assert not index.path.exists()
+    assert index.pages == {}
+    index.purge()
@@ -0,0 +1,55 @@
+"""Test the memo module."""
+from scrapd.core import apd
+from scrapd.core import model
+from scrapd.core import memo as memo_module
+from scrapd.core.memo import ParseMemo
+from tests.test_common import load_test_page
+
+
+def test_init_00(tmp_path, monkeypatch):
+    """Ensure the entries are keyed by the source of the parser modules by default."""
+    version = ParseMemo(tmp_path).version
+    assert version == memo_module.parser_digest()
+    monkeypatch.setattr(memo_module, 'PARSER_MODULES', ('article', ))
+    assert ParseMemo(tmp_path).version != version
+
+
+def test_get_00(tmp_path):
+    """Ensure a page which was never parsed returns `None`."""
+    memo = ParseMemo(tmp_path, version='1.0.0')
+    assert memo.get('page') is None
+
+
+def test_get_01(tmp_path):
+    """Ensure a corrupted entry is ignored."""
+    memo = ParseMemo(tmp_path, version='1.0.0')
+    memo.path('page').parent.mkdir(parents=True)
+    memo.path('page').write_text('{')
+    assert memo.get('page') is None
+
+
+def test_set_00(tmp_path):
+    """Ensure the parsed report and errors are restored."""
+    page = load_test_page('traffic-fatality-2-3')
+    parsed = apd.parse_detail_page(page, 'url')
+    memo = ParseMemo(tmp_path, version='1.0.0')
+    memo.set(page, parsed.report, parsed.short_circuited, parsed.errors)
+    assert memo.get(page) == (parsed.report, False, list(parsed.errors))
+
+
+def test_set_01(tmp_path):
+    """Ensure the entries depend on the page content, the version and the parsing mode."""
+    memo = ParseMemo(tmp_path, version='1.0.0')
+    memo.set('page', model.Report(case='19-123456'))
+    assert memo.get('page') is not None
+    assert memo.get('other page') is None
+    assert memo.get('page', tiered=True) is None
+    assert ParseMemo(tmp_path, version='1.0.1').get('page') is None
+
+
+def test_purge_00(tmp_path):
+    """Ensure all the entries are removed."""
+    memo = ParseMemo(tmp_path / 'memo', version='1.0.0')
+    memo.set('page', model.Report(case='19-123456'))
+    memo.purge()
+    assert memo.get('page') is None
@@ -2,6 +2,8 @@
 import pytest
 
 from scrapd.core import regex
+from scrapd.core.constant import Fields
+from tests.test_common import load_test_page
 
 
 @pytest.mark.parametrize('input_,expected', (
@@ -53,3 +55,29 @@ def test_parse_location_field_00(input_, expected):
     """Ensure."""
     actual = regex.match_location_field(input_)
     assert actual == expected
+
+
+@pytest.mark.parametrize('page', (
+    'traffic-fatality-2-3',
+    'traffic-fatality-50-3',
+    'traffic-fatality-73-2',
+))
+def test_scan_00(page):
+    """Ensure the scan captures the same fields as the individual matchers."""
+    content = load_test_page(page)
+    actual = regex.scan(content)
+    assert actual[Fields.CASE] == regex.match_case_field(content)
+    assert actual[Fields.CRASH] == regex.match_crash_field(content)
+    assert regex.parse_date_field(actual[Fields.DATE]) == regex.match_date_field(content)
+    assert actual[Fields.LOCATION] == regex.match_location_field(content)
+    assert actual[Fields.TIME] == regex.match_time_field(content)
+    assert actual[regex.TWITTER_TITLE] == regex.match_pattern(content, regex.TWITTER_TITLE_PATTERN)
+    assert actual[regex.TWITTER_DESCRIPTION] == regex.match_pattern(content, regex.TWITTER_DESCRIPTION_PATTERN)
+
+
+def test_scan_01():
+    """Ensure the missing fields are captured as empty strings."""
+    assert regex.scan('<p><strong>Case:</strong> 19-123456</p>', (Fields.CASE, Fields.TIME)) == {
+        Fields.CASE: '19-123456',
+        Fields.TIME: '',
+    }
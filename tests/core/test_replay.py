@@ -0,0 +1,92 @@
+"""Test the replay module."""
+from loguru import logger
+import pytest
+
+from scrapd.core import apd
+from scrapd.core import crawl
+from scrapd.core import replay
+from scrapd.core.archive import PageArchive
+from scrapd.core.replay import ReplaySession
+from tests.test_common import load_test_page
+from tests.test_common import TEST_DATA_DIR
+from tests.test_common import write_replay_dir
+
+# Disable logging for the tests.
+logger.remove()
+
+
+@pytest.mark.parametrize('url,params,expected', (
+    pytest.param(apd.APD_URL, None, '296', id='news-page'),
+    pytest.param(apd.APD_URL, {'page': 1}, '296-page=1', id='next-news-page'),
+    pytest.param('http://austintexas.gov/news/traffic-fatality-2-3', {}, 'traffic-fatality-2-3', id='detail-page'),
+))
+def test_archive_name_00(url, params, expected):
+    """Ensure the archived file names match the layout of the test data."""
+    assert replay.archive_name(url, params) == expected
+
+
+@pytest.mark.asyncio
+async def test_get_00():
+    """Ensure a page is read from the archive."""
+    async with ReplaySession(TEST_DATA_DIR) as session:
+        text = await apd.fetch_news_page(session, 2)
+    assert text == load_test_page('296-page=1')
+
+
+@pytest.mark.asyncio
+async def test_get_01():
+    """Ensure a missing page returns an empty 404 response."""
+    async with ReplaySession(TEST_DATA_DIR) as session:
+        async with session.get('http://austintexas.gov/news/missing') as response:
+            assert response.status == 404
+            assert await response.text() == ''
+
+
+@pytest.mark.asyncio
+async def test_get_02(tmp_path):
+    """Ensure a page is read from a page archive file."""
+    page_archive = PageArchive(tmp_path / 'pages.warc.gz')
+    page_archive.write(f'{apd.APD_URL}?page=1', 200, {}, 'news page')
+    async with ReplaySession(page_archive.path) as session:
+        assert await apd.fetch_news_page(session, 2) == 'news page'
+        assert await apd.fetch_news_page(session, 3) == ''
+
+
+@pytest.mark.asyncio
+async def test_async_retrieve_00(tmp_path):
+    """Ensure the whole pipeline runs from an archive."""
+    write_replay_dir(tmp_path)
+    data, page_count = await crawl.async_retrieve(replay_dir=tmp_path)
+    assert page_count == 1
+    assert sorted(report.crash for report in data) == [2, 71, 72, 73]
+
+
+@pytest.mark.asyncio
+async def test_aiter_reports_00():
+    """Ensure the reports are yielded as soon as they are available."""
+    reports = crawl.aiter_reports(replay_dir=TEST_DATA_DIR, from_='2019-01-16', to='2019-01-16')
+    report = await reports.__anext__()
+    await reports.aclose()
+    assert report.case == '19-0161105'
+
+
+def test_iter_reports_00(tmp_path):
+    """Ensure the synchronous iterator yields the same reports as the asynchronous one."""
+    write_replay_dir(tmp_path)
+    reports = list(crawl.iter_reports(replay_dir=tmp_path, from_='2018-12-01', to='2018-12-31'))
+    assert sorted(report.crash for report in reports) == [71, 72, 73]
+
+
+@pytest.mark.parametrize('from_,to,prefiltered', (
+    pytest.param('2019-01-16', '2019-01-18', 4, id='published-before'),
+    pytest.param('2018-08-01', '2018-08-31', 6, id='published-too-late'),
+    pytest.param('2018-12-01', '2018-12-31', 0, id='published-within-lag'),
+))
+def test_iter_reports_01(tmp_path, from_, to, prefiltered):
+    """Ensure the links published outside of the time range are skipped without changing the results."""
+    write_replay_dir(tmp_path)
+    expected = list(crawl.iter_reports(replay_dir=tmp_path, from_=from_, to=to))
+    context = apd.CrawlContext()
+    actual = list(crawl.iter_reports(replay_dir=tmp_path, from_=from_, to=to, prefilter=True, context=context))
+    assert sorted(report.case for report in actual) == sorted(report.case for report in expected)
+    assert context.progress['prefiltered'] == prefiltered
@@ -0,0 +1,302 @@
+"""Test the scheduler module."""
+import asyncio
+from collections import namedtuple
+import datetime
+from email.utils import format_datetime
+import math
+from unittest import mock
+
+import pytest
+
+from scrapd.core import constant
+from scrapd.core import scheduler
+from scrapd.core.scheduler import ConcurrencyLimit
+from scrapd.core.scheduler import Scheduler
+from scrapd.core.scheduler import TokenBucket
+
+FakeResponse = namedtuple('FakeResponse', ['status', 'headers'])
+
+
+def test_token_bucket_00():
+    """Ensure the tokens of a full bucket are available immediately."""
+    bucket = TokenBucket(2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+
+
+def test_token_bucket_01():
+    """Ensure an empty bucket delays the requests according to its rate."""
+    bucket = TokenBucket(2)
+    bucket.reserve()
+    bucket.reserve()
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.01)
+    assert bucket.reserve() == pytest.approx(1, abs=0.01)
+
+
+def test_token_bucket_02():
+    """Ensure a paused bucket delays the requests."""
+    bucket = TokenBucket(10)
+    bucket.pause(3)
+    assert bucket.reserve() == pytest.approx(3, abs=0.01)
+
+
+@pytest.mark.parametrize('input_,expected', (
+    pytest.param(None, 1.0, id='missing'),
+    pytest.param('2', 2.0, id='seconds'),
+    pytest.param('soon', 1.0, id='invalid'),
+    pytest.param('Wed, 21 Oct 2015 07:28:00 GMT', 0.0, id='past-date'),
+))
+def test_parse_retry_after_00(input_, expected):
+    """Ensure the Retry-After header is parsed correctly."""
+    assert scheduler.parse_retry_after(input_) == expected
+
+
+def test_parse_retry_after_01():
+    """Ensure a Retry-After date is converted to a delay."""
+    retry_date = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=60)
+    assert scheduler.parse_retry_after(format_datetime(retry_date, usegmt=True)) == pytest.approx(60, abs=2)
+
+
+@pytest.mark.asyncio
+async def test_slot_00():
+    """Ensure the number of requests in flight is capped."""
+    s = Scheduler(max_in_flight=2, rate=0)
+    in_flight = 0
+    max_seen = 0
+
+    async def request():
+        nonlocal in_flight, max_seen
+        async with s.slot('http://example.com'):
+            in_flight += 1
+            max_seen = max(max_seen, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*[request() for _ in range(6)])
+    assert max_seen == 2
+
+
+@pytest.mark.asyncio
+async def test_submit_00():
+    """Ensure a throttled request is sent again after pausing the host."""
+    s = Scheduler(max_in_flight=0, rate=100)
+    responses = [FakeResponse(429, {'Retry-After': '0'}), FakeResponse(200, {})]
+    request = mock.Mock(side_effect=lambda: asyncio.sleep(0, result=responses.pop(0)))
+    response = await s.submit('http://example.com', request)
+    assert response.status == 200
+    assert request.call_count == 2
+    assert s.throttled == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_01():
+    """Ensure the throttled response is returned once the retries are exhausted."""
+    s = Scheduler(max_in_flight=0, rate=0, max_throttled=1)
+    request = mock.Mock(side_effect=lambda: asyncio.sleep(0, result=FakeResponse(503, {'Retry-After': '0'})))
+    response = await s.submit('http://example.com', request)
+    assert response.status == 503
+    assert request.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_coalesce_00():
+    """Ensure the concurrent identical requests share a single request."""
+    s = Scheduler()
+    request = mock.Mock(side_effect=lambda: asyncio.sleep(0.01, result='page'))
+    results = await asyncio.gather(*[s.coalesce('http://example.com', request) for _ in range(3)])
+    assert results == ['page'] * 3
+    assert request.call_count == 1
+    assert s.coalesced == 2
+    assert not s.in_flight
+
+
+@pytest.mark.asyncio
+async def test_coalesce_01():
+    """Ensure the shared request survives the cancellation of one of its callers."""
+    s = Scheduler()
+    request = mock.Mock(side_effect=lambda: asyncio.sleep(0.05, result='page'))
+    first = asyncio.ensure_future(s.coalesce('http://example.com', request))
+    second = asyncio.ensure_future(s.coalesce('http://example.com', request))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == 'page'
+    assert first.cancelled()
+    assert request.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_coalesce_02():
+    """Ensure the shared request is cancelled along with its last caller."""
+    s = Scheduler()
+    request = mock.Mock(side_effect=lambda: asyncio.sleep(60))
+    caller = asyncio.ensure_future(s.coalesce('http://example.com', request))
+    await asyncio.sleep(0.01)
+    task = s.in_flight['http://example.com']
+    caller.cancel()
+    await asyncio.gather(caller, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    assert not s.in_flight
+
+
+@pytest.mark.asyncio
+async def test_coalesce_03():
+    """Ensure the requests which are not concurrent are all sent."""
+    s = Scheduler()
+    request = mock.Mock(side_effect=lambda: asyncio.sleep(0, result='page'))
+    assert await s.coalesce('http://example.com', request) == 'page'
+    assert await s.coalesce('http://example.com', request) == 'page'
+    assert request.call_count == 2
+    assert s.coalesced == 0
+
+
+def test_hedge_delay_00():
+    """Ensure the requests are only hedged once enough latencies were observed."""
+    s = Scheduler(hedge=True)
+    s.latencies.extend([0.1] * (constant.HEDGE_MIN_SAMPLES - 1))
+    assert s.hedge_delay() is None
+    s.latencies.append(0.1)
+    assert s.hedge_delay() == 0.1
+    assert Scheduler().hedge_delay() is None
+
+
+def test_hedge_delay_01():
+    """Ensure the requests are hedged after the 95th percentile of the latencies."""
+    s = Scheduler(hedge=True)
+    s.latencies.extend(i / 100 for i in range(100))
+    assert s.hedge_delay() == pytest.approx(0.95)
+
+
+@pytest.mark.asyncio
+async def test_send_00():
+    """Ensure a slow request is hedged, and the first response is kept."""
+    s = Scheduler(max_in_flight=0, rate=0, hedge=True)
+    s.latencies.extend([0.01] * constant.HEDGE_MIN_SAMPLES)
+    delays = [60, 0]
+    request = mock.Mock(side_effect=lambda: asyncio.sleep(delays.pop(0), result=FakeResponse(200, {})))
+    response = await asyncio.wait_for(s.send('http://example.com', request), 1)
+    assert response.status == 200
+    assert request.call_count == 2
+    assert s.hedged == 1
+
+
+@pytest.mark.asyncio
+async def test_send_01():
+    """Ensure the hedged request is used when the original one fails."""
+    s = Scheduler(max_in_flight=0, rate=0, hedge=True)
+    s.latencies.extend([0.01] * constant.HEDGE_MIN_SAMPLES)
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError('failed')
+
+    requests = [fail, lambda: asyncio.sleep(0.1, result=FakeResponse(200, {}))]
+    response = await s.send('http://example.com', lambda: requests.pop(0)())
+    assert response.status == 200
+
+
+@pytest.mark.asyncio
+async def test_send_02():
+    """Ensure a fast request is not hedged."""
+    s = Scheduler(max_in_flight=0, rate=0, hedge=True)
+    s.latencies.extend([1] * constant.HEDGE_MIN_SAMPLES)
+    request = mock.Mock(side_effect=lambda: asyncio.sleep(0, result=FakeResponse(200, {})))
+    await s.send('http://example.com', request)
+    assert request.call_count == 1
+    assert s.hedged == 0
+    assert len(s.latencies) == constant.HEDGE_MIN_SAMPLES + 1
+
+
+@pytest.mark.asyncio
+async def test_send_03():
+    """Ensure a request waiting for a slot is not hedged, and its wait is not recorded as latency."""
+    s = Scheduler(max_in_flight=1, rate=0, hedge=True)
+    s.latencies.extend([0.01] * constant.HEDGE_MIN_SAMPLES)
+    request = mock.Mock(side_effect=lambda: asyncio.sleep(0, result=FakeResponse(200, {})))
+    async with s.slot('http://example.com'):
+        task = asyncio.ensure_future(s.send('http://example.com', request))
+        await asyncio.sleep(0.1)
+        assert not request.called
+    await asyncio.wait_for(task, 1)
+    assert request.call_count == 1
+    assert s.hedged == 0
+    assert s.latencies[-1] < 0.1
+
+
+def test_concurrency_limit_00():
+    """Ensure a fixed limit does not adapt."""
+    limit = ConcurrencyLimit(4)
+    limit.failure()
+    limit.success(0.1)
+    assert limit.limit == 4
+    assert ConcurrencyLimit(0).limit == math.inf
+
+
+def test_concurrency_limit_01():
+    """Ensure an adaptive limit widens additively while the latency stays healthy, up to the maximum."""
+    limit = ConcurrencyLimit(4, adaptive=True)
+    assert limit.limit == constant.AIMD_INITIAL
+    for _ in range(3):
+        limit.success(0.1)
+    assert limit.limit == 3
+    limit.success(1)
+    assert limit.limit == 3
+    for _ in range(10):
+        limit.success(0.1)
+    assert limit.limit == 4
+
+
+def test_concurrency_limit_02():
+    """Ensure an adaptive limit narrows multiplicatively, at most once per window of responses."""
+    limit = ConcurrencyLimit(0, adaptive=True)
+    limit.window = 8
+    limit.outcomes = 8
+    limit.failure()
+    assert limit.limit == 4
+    limit.failure()
+    assert limit.limit == 4
+    limit.outcomes = 4
+    limit.failure()
+    assert limit.limit == 2
+    assert limit.decreases == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_03():
+    """Ensure the waiting requests are sent as soon as the window widens."""
+    limit = ConcurrencyLimit(4, adaptive=True)
+    await limit.acquire()
+    await limit.acquire()
+    waiting = asyncio.ensure_future(limit.acquire())
+    await asyncio.sleep(0)
+    assert not waiting.done()
+    for _ in range(3):
+        limit.success(0.1)
+    await asyncio.wait_for(waiting, 1)
+    assert limit.active == 3
+
+
+@pytest.mark.asyncio
+async def test_submit_02():
+    """Ensure the server errors narrow the window of an adaptive scheduler."""
+    s = Scheduler(max_in_flight=8, rate=0, max_throttled=0, adaptive=True)
+    s.concurrency.window = 8
+    s.concurrency.outcomes = 8
+    request = mock.Mock(side_effect=lambda: asyncio.sleep(0, result=FakeResponse(500, {})))
+    await s.submit('http://example.com', request)
+    assert s.concurrency.limit == 4
+
+
+@pytest.mark.asyncio
+async def test_submit_03():
+    """Ensure a cancelled request does not narrow the window of an adaptive scheduler."""
+    s = Scheduler(max_in_flight=8, rate=0, adaptive=True)
+    s.concurrency.window = 8
+    s.concurrency.outcomes = 8
+    task = asyncio.ensure_future(s.submit('http://example.com', lambda: asyncio.sleep(60)))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert s.concurrency.limit == 8
+    assert s.concurrency.decreases == 0
@@ -0,0 +1,54 @@
+"""Test the state module."""
+import datetime
+
+from scrapd.core import model
+from scrapd.core.state import CrawlState
+
+REPORT = model.Report(
+    case='19-123456',
+    date=datetime.date(2019, 1, 16),
+    link='http://austintexas.gov/news/traffic-fatality-2-3',
+    fatalities=[model.Fatality(first='John', last='Doe', dob=datetime.date(1970, 1, 1))],
+)
+
+
+def test_add_00(tmp_path):
+    """Ensure a report is indexed by its link."""
+    state = CrawlState(tmp_path / 'state.json')
+    state.add(REPORT)
+    assert REPORT.link in state
+    assert state.get(REPORT.link) == REPORT
+
+
+def test_between_00(tmp_path):
+    """Ensure the reports are filtered by date."""
+    state = CrawlState(tmp_path / 'state.json')
+    state.add(REPORT)
+    assert state.between(datetime.date(2019, 1, 1), datetime.date(2019, 1, 31)) == [REPORT]
+    assert state.between(datetime.date(2019, 2, 1)) == []
+
+
+def test_save_load_00(tmp_path):
+    """Ensure the state survives a round trip to the disk."""
+    state = CrawlState(tmp_path / 'dir' / 'state.json')
+    state.add(REPORT)
+    state.save()
+    loaded = CrawlState(tmp_path / 'dir' / 'state.json')
+    loaded.load()
+    assert loaded.get(REPORT.link) == REPORT
+
+
+def test_load_00(tmp_path):
+    """Ensure a missing state file results in an empty state."""
+    state = CrawlState(tmp_path / 'state.json')
+    state.load()
+    assert state.reports == {}
+
+
+def test_load_01(tmp_path):
+    """Ensure an invalid state file results in an empty state."""
+    state_file = tmp_path / 'state.json'
+    state_file.write_text('{"reports": {"link": {"case": "invalid"}}}')
+    state = CrawlState(state_file)
+    state.load()
+    assert state.reports == {}
@@ -1,7 +1,10 @@
 """Define the common values and functions to run the tests."""
+import datetime
 from pathlib import Path
 
+from scrapd.core import apd
 from scrapd.core import constant
+from scrapd.core import replay
 
 TEST_ROOT_DIR = Path(__file__).resolve().parent
 TEST_DATA_DIR = TEST_ROOT_DIR / 'data'
@@ -20,6 +23,43 @@ def load_dumped_page(page):
     return page_fd.read_text()
 
 
+def write_news_pages(directory, count, shift=0, next_links=False):
+    """
+    Write news pages listing one news each, published 30 days before the one of the previous page.
+
+    The news are moved by `shift` pages, as if as many news had been published since. With `next_links`, each page but
+    the last one links to the next one.
+    """
+    for page in range(1, count + 1):
+        news = page - shift
+        publication_date = datetime.date(2019, 1, 31) - datetime.timedelta(days=30 * (news - 1))
+        name = replay.archive_name(apd.APD_URL, {'page': page - 1} if page > 1 else None)
+        next_link = '<a title="Go to next page" href="/department/news/296?page=1">next ›</a>'
+        (directory / name).write_text(
+            f'<li class="views-row"><span property="dc:date" content="{publication_date}T00:00:00-06:00"></span>'
+            f'<a href="/news/news-{news}">News #{news}</a></li><li class="pager-current">{page} of {count}</li>'
+            f'{next_link if next_links and page < count else ""}')
+
+
+def write_replay_dir(directory, pages=1):
+    """
+    Write a replay directory listing the news of the test news page, along with their detail pages.
+
+    The test news page is repeated `pages` times, and only the last one has no link to the next one. The detail pages
+    missing from the test data are replaced by a copy of `traffic-fatality-2-3`.
+    """
+    news_page = load_test_page('296')
+    for page in range(1, pages + 1):
+        name = replay.archive_name(apd.APD_URL, {'page': page - 1} if page > 1 else None)
+        (directory / name).write_text(news_page if page < pages else news_page.replace('next ›', ''))
+    links = apd.extract_traffic_fatalities_page_details_link(news_page)
+    for link, *_ in links:
+        name = replay.archive_name(link)
+        page = name if (TEST_DATA_DIR / name).exists() else 'traffic-fatality-2-3'
+        (directory / name).write_text(load_test_page(page))
+    return links
+
+
 def scenario_inputs(scenarios):
     """Parse the scenarios and feed the data to the test function."""
     return [test_input[0] for test_input in scenarios]